@@ -1,13 +1,48 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash
-from werkzeug.security import generate_password_hash, check_password_hash
+import json
+import os
+import time
+import uuid
+import click
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash, abort, stream_with_context
 from datetime import datetime
 from models import db, User, Quiz, UserQuizzes, Question, Subject, Chapter
 from routes.stats import stats_bp
+from migrations import ensure_schema, upgrade, get_schema_version
+from services.performance import (rebuild_user_performance, average_scores, attempt_count,
+                                  subject_averages, chapter_averages, running_averages, daily_running_averages)
+from services.versions import CONTENT, bump_version, get_version, quiz_version_name
+from services.content_tree import get_content_tree, get_subject_chapters
+from services.stats import forget_quiz, forget_chapter, forget_user_attempts, rebuild_stats, check_stats_consistency
+from services.query_plans import explain_hot_queries
+from services.assignments import assign_quizzes, AssignmentBudgetExceeded
+from services.question_import import detect_format, import_questions, parse_question
+from services.results import results_page
+from services.quiz_meta import adjust_question_count, rebuild_question_counts, quiz_metadata, question_ids
+from services.attempts import encode_attempt, attempt_view, storage_report
+from services.question_stats import (forget_questions, forget_user_question_results, rebuild_question_stats,
+                                     quiz_question_report)
+from services.quiz_cache import quiz_cache, get_compiled_quiz
+from services.grading import regrade_quiz
+from services.engine_profile import configure_sqlite, sqlite_settings
+from services.submissions import save_submission, submission_queue
+from services.passwords import password_hasher
+from services.synthetic import generate_dataset
+from services.route_bench import RouteBenchmark, compare_results, load_results
+from services.sql_profiler import sql_profiler
+from services.metrics import metrics
+from services.response_cache import response_cache, cached_json
+from services.export import EXPORT_FORMATS, parse_date_range, export_results
+from services.content_snapshot import SnapshotError, export_content, import_content
+from services.question_search import (search_questions, find_near_duplicates, index_question_bands,
+                                      rebuild_search_index, rebuild_question_bands)
+from services.catalogue import catalogue_page
 
 def init_admin():
     existing_admin = User.query.filter_by(username='admin1').first()
     if not existing_admin:
-        admin_password = generate_password_hash('admin')
+        # Runs at import; hashing inline keeps the worker pool from starting here
+        admin_password = password_hasher.hash('admin', inline=True)
         admin_user = User(
             username='admin1',
             password=admin_password,
@@ -22,21 +57,92 @@ def init_admin():
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'feb17e6b4dcc472cebac25acd17cd28d'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///quizzer.db'
+# QUIZZER_DATABASE_URI points the app at another database, e.g. a synthetic one for benchmarks
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('QUIZZER_DATABASE_URI', 'sqlite:///quizzer.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Students with more completed attempts than this get a per-day time series on /summary
+app.config['SUMMARY_DAILY_ROLLUP_THRESHOLD'] = 1000
+# Apply pending schema migrations at startup instead of refusing to start
+app.config['AUTO_MIGRATE'] = True
+# Bulk assignment limits: rows per INSERT, total pairs per request, seconds per transaction
+app.config['BULK_ASSIGN_BATCH_SIZE'] = 500
+app.config['BULK_ASSIGN_MAX_PAIRS'] = 200000
+app.config['BULK_ASSIGN_TIME_BUDGET'] = 10.0
+# Question import: rows per transaction and how many rejected rows to report
+app.config['IMPORT_BATCH_SIZE'] = 1000
+app.config['IMPORT_MAX_ERRORS'] = 20
+# Compiled quizzes kept in memory for take_quiz/submit_quiz
+app.config['QUIZ_CACHE_SIZE'] = 256
+# Attempts read per chunk when regrading a quiz
+app.config['REGRADE_CHUNK_SIZE'] = 5000
+# SQLite connection profile: WAL journal, fsync at checkpoints, wait up to this long for the write lock
+app.config['SQLITE_JOURNAL_MODE'] = 'WAL'
+app.config['SQLITE_SYNCHRONOUS'] = 'NORMAL'
+app.config['SQLITE_BUSY_TIMEOUT_MS'] = 5000
+# Coalesce concurrent quiz submissions into one transaction (max writes per batch, max wait for a batch to fill)
+app.config['SUBMISSION_GROUP_COMMIT'] = False
+app.config['SUBMISSION_BATCH_SIZE'] = 50
+app.config['SUBMISSION_BATCH_WAIT_MS'] = 5
+# Password hashing: werkzeug method string (hashes made with other parameters are upgraded at login),
+# worker processes (0 hashes on the request thread) and how many hashes may queue for them
+app.config['PASSWORD_HASH_METHOD'] = 'scrypt:32768:8:1'
+app.config['PASSWORD_HASH_WORKERS'] = 2
+app.config['PASSWORD_HASH_MAX_PENDING'] = 64
+# Per-request SQL counts and timing in X-DB-* headers and the 'quizzer.sql' log;
+# a statement run more than SQL_REPEAT_THRESHOLD times in one request is reported as a likely N+1
+app.config['SQL_PROFILING'] = False
+app.config['SQL_REPEAT_THRESHOLD'] = 10
+# Request counts, latency histograms and cache/DB gauges at /metrics
+app.config['METRICS_ENABLED'] = True
+# Serialized JSON bodies kept for get_quiz, get_chapters and the stats API
+app.config['RESPONSE_CACHE_SIZE'] = 512
+# Attempts read per query when exporting results
+app.config['EXPORT_CHUNK_SIZE'] = 1000
+# Reject /add_question when an existing question's text is at least this similar (Jaccard, 0-1),
+# unless the request sets allow_duplicate
+app.config['DUPLICATE_QUESTION_CHECK'] = True
+app.config['DUPLICATE_QUESTION_THRESHOLD'] = 0.7
+# Largest page the question search returns
+app.config['SEARCH_MAX_PER_PAGE'] = 100
+# Largest page of the student quiz catalogue (HTML and JSON)
+app.config['CATALOGUE_MAX_PAGE_SIZE'] = 100
 
 # Initialize the database with this application
 db.init_app(app)
+quiz_cache.max_size = app.config['QUIZ_CACHE_SIZE']
+response_cache.max_size = app.config['RESPONSE_CACHE_SIZE']
+submission_queue.init_app(app)
+password_hasher.init_app(app)
 
 # Register blueprints
 app.register_blueprint(stats_bp)
 
-# Create all tables
+# Bring the schema up to date without touching existing data
 with app.app_context():
-    # Drop all tables first
-    db.drop_all()
-    # Create all tables
-    db.create_all()
+    configure_sqlite(db.engine,
+                     journal_mode=app.config['SQLITE_JOURNAL_MODE'],
+                     synchronous=app.config['SQLITE_SYNCHRONOUS'],
+                     busy_timeout_ms=app.config['SQLITE_BUSY_TIMEOUT_MS'])
+    sql_profiler.init_app(app, db.engine)
+    metrics.init_app(app, db.engine)
+    pool = db.engine.pool
+    # QueuePool reports unused overflow capacity as a negative overflow
+    metrics.gauge('quizzer_db_pool', 'DB connection pool size and connections by state', lambda: [
+        ((('stat', 'size'),), pool.size()),
+        ((('stat', 'checkedin'),), pool.checkedin()),
+        ((('stat', 'checkedout'),), pool.checkedout()),
+        ((('stat', 'overflow'),), max(pool.overflow(), 0))
+    ] if hasattr(pool, 'overflow') else [])
+    metrics.gauge('quizzer_quiz_cache', 'Compiled quiz cache size and counters', lambda: [
+        ((('stat', stat),), value) for stat, value in quiz_cache.stats().items()
+    ])
+    metrics.gauge('quizzer_response_cache', 'JSON response cache size and counters', lambda: [
+        ((('stat', stat),), value) for stat, value in response_cache.stats().items()
+    ])
+    metrics.gauge('quizzer_submission_queue', 'Group-commit queue depth and totals', lambda: [
+        ((('stat', stat),), value) for stat, value in submission_queue.stats().items()
+    ])
+    ensure_schema(auto_migrate=app.config['AUTO_MIGRATE'])
     # Initialize admin user
     init_admin()
 
@@ -52,7 +158,11 @@ def login():
 
     user = User.query.filter_by(username=username, role=role).first()
     
-    if user and check_password_hash(user.password, password):
+    if user and password_hasher.verify(user.password, password):
+        # Upgrade hashes made with older parameters while the plain password is at hand
+        if password_hasher.needs_rehash(user.password):
+            user.password = password_hasher.hash(password)
+            db.session.commit()
         session['user_id'] = user.id
         session['role'] = user.role
         
@@ -83,7 +193,7 @@ def register():
             flash('Email already exists. Please use a different email.', 'error')
             return redirect(url_for('index'))
 
-        hashed_password = generate_password_hash(password)
+        hashed_password = password_hasher.hash(password)
         
         new_user = User(
             full_name=full_name, 
@@ -111,44 +221,57 @@ def student_dashboard():
         return redirect(url_for('login'))
     
     user = User.query.get_or_404(session['user_id'])
-    assigned_quizzes = UserQuizzes.query.filter_by(user_id=user.id).all()
-    
+
+    # One joined query for every assignment; the totals ride along as window
+    # aggregates and completed attempts come back newest first
+    is_completed = db.func.coalesce(UserQuizzes.completed, False)
+    assignments = db.session.query(
+        Quiz.id,
+        Quiz.title,
+        Quiz.duration,
+        Subject.name.label('subject_name'),
+        UserQuizzes.assigned_at,
+        UserQuizzes.completed_at,
+        UserQuizzes.score,
+        is_completed.label('completed'),
+        db.func.count().over().label('total_quizzes'),
+        db.func.sum(db.case((is_completed == True, 1), else_=0)).over().label('completed_quizzes')
+    ).join(
+        Quiz, UserQuizzes.quiz_id == Quiz.id
+    ).outerjoin(
+        Subject, Quiz.subject_id == Subject.id
+    ).filter(
+        UserQuizzes.user_id == user.id
+    ).order_by(
+        UserQuizzes.completed_at.desc(), UserQuizzes.id
+    ).all()
+
     # Calculate statistics
-    total_quizzes = len(assigned_quizzes)
-    completed_quizzes = sum(1 for quiz in assigned_quizzes if quiz.completed)
+    total_quizzes = assignments[0].total_quizzes if assignments else 0
+    completed_quizzes = assignments[0].completed_quizzes if assignments else 0
     pending_quizzes = total_quizzes - completed_quizzes
-    
-    # Get upcoming quizzes (not completed)
+
     upcoming_quizzes = []
-    for user_quiz in assigned_quizzes:
-        if not user_quiz.completed:
-            quiz = user_quiz.quiz
-            subject = Subject.query.get(quiz.subject_id)
-            upcoming_quizzes.append({
-                'id': quiz.id,
-                'title': quiz.title,
-                'subject_name': subject.name if subject else 'Unknown Subject',
-                'assigned_at': user_quiz.assigned_at,
-                'duration': quiz.duration
-            })
-    
-    # Get completed quizzes with scores
     completed_quizzes_list = []
-    for user_quiz in assigned_quizzes:
-        if user_quiz.completed:
-            quiz = user_quiz.quiz
-            subject = Subject.query.get(quiz.subject_id)
+    for row in assignments:
+        subject_name = row.subject_name or 'Unknown Subject'
+        if row.completed:
             completed_quizzes_list.append({
-                'id': quiz.id,
-                'title': quiz.title,
-                'subject_name': subject.name if subject else 'Unknown Subject',
-                'completed_at': user_quiz.completed_at,
-                'score': user_quiz.score
+                'id': row.id,
+                'title': row.title,
+                'subject_name': subject_name,
+                'completed_at': row.completed_at,
+                'score': row.score
             })
-    
-    # Sort completed quizzes by completion date (newest first)
-    completed_quizzes_list.sort(key=lambda x: x['completed_at'], reverse=True)
-    
+        else:
+            upcoming_quizzes.append({
+                'id': row.id,
+                'title': row.title,
+                'subject_name': subject_name,
+                'assigned_at': row.assigned_at,
+                'duration': row.duration
+            })
+
     return render_template('student_dashboard.html',
                          user=user,
                          total_quizzes=total_quizzes,
@@ -196,47 +319,97 @@ def assign_quiz():
         print(f"Error in assign_quiz: {str(e)}")  # For debugging
         return jsonify({"message": f"Error assigning quiz: {str(e)}"}), 500
 
+@app.route('/assign_quizzes', methods=['POST'])
+def assign_quizzes_bulk():
+    if 'user_id' not in session or session.get('role') != 'admin':
+        return jsonify({"success": False, "message": "Unauthorized"}), 401
+
+    data = request.get_json() or {}
+    user_ids = data.get('user_ids')
+    quiz_ids = data.get('quiz_ids')
+
+    if not isinstance(user_ids, list) or not isinstance(quiz_ids, list) or not user_ids or not quiz_ids:
+        return jsonify({"success": False, "message": "user_ids and quiz_ids must be non-empty lists"}), 400
+
+    if len(user_ids) * len(quiz_ids) > app.config['BULK_ASSIGN_MAX_PAIRS']:
+        return jsonify({"success": False, "message": f"At most {app.config['BULK_ASSIGN_MAX_PAIRS']} assignments per request"}), 400
+
+    try:
+        results = assign_quizzes(user_ids, quiz_ids,
+                                 batch_size=app.config['BULK_ASSIGN_BATCH_SIZE'],
+                                 time_budget=app.config['BULK_ASSIGN_TIME_BUDGET'])
+        db.session.commit()
+    except AssignmentBudgetExceeded as e:
+        db.session.rollback()
+        return jsonify({"success": False, "message": str(e)}), 503
+    except (TypeError, ValueError):
+        db.session.rollback()
+        return jsonify({"success": False, "message": "user_ids and quiz_ids must contain integers"}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"success": False, "message": str(e)}), 500
+
+    assigned = sum(1 for result in results if result['status'] == 'assigned')
+    return jsonify({
+        "success": True,
+        "message": f"Assigned {assigned} of {len(results)} requested quiz assignments",
+        "assigned": assigned,
+        "skipped": len(results) - assigned,
+        "results": results
+    })
+
+def catalogue_args():
+    """Read the student catalogue filters, sort, page size and cursor from the query string."""
+    filters = {
+        'subject_id': request.args.get('subject_id', type=int),
+        'chapter_id': request.args.get('chapter_id', type=int),
+        'status': request.args.get('status') or None,
+        'sort': request.args.get('sort') or 'assigned'
+    }
+    limit = min(max(request.args.get('limit', 20, type=int), 1), app.config['CATALOGUE_MAX_PAGE_SIZE'])
+    return filters, limit, request.args.get('cursor')
+
 @app.route('/student/quiz')
 def student_quiz():
     if 'user_id' not in session or session.get('role') != 'student':
         return redirect(url_for('index'))
-    
-    # Get all subjects for the filter dropdown
-    subjects = Subject.query.all()
-    
-    # Get assigned quizzes with subject and chapter information
-    assigned_quizzes = db.session.query(
-        Quiz,
-        Subject.name.label('subject_name'),
-        Chapter.title.label('chapter_name'),
-        db.func.count(Question.id).label('question_count')
-    ).join(
-        Chapter, Quiz.chapter_id == Chapter.id
-    ).join(
-        Subject, Chapter.subject_id == Subject.id
-    ).join(
-        Question, Quiz.id == Question.quiz_id
-    ).join(
-        UserQuizzes, Quiz.id == UserQuizzes.quiz_id
-    ).filter(
-        UserQuizzes.user_id == session['user_id']
-    ).group_by(
-        Quiz.id, Subject.name, Chapter.title
-    ).all()
 
-    # Format the data for the template
-    quizzes = []
-    for quiz, subject_name, chapter_name, question_count in assigned_quizzes:
-        quizzes.append({
-            'id': quiz.id,
-            'title': quiz.title,
-            'subject_name': subject_name,
-            'chapter_name': chapter_name,
-            'duration': quiz.duration,
-            'question_count': question_count
-        })
+    # One page of assigned quizzes, filtered and sorted in SQL
+    filters, limit, cursor = catalogue_args()
+    try:
+        quizzes, next_cursor = catalogue_page(session['user_id'], cursor=cursor, limit=limit, **filters)
+    except ValueError:
+        return "Invalid filter or page cursor", 400
+
+    return render_template('student_quiz.html',
+                         assigned_quizzes=quizzes,
+                         subjects=get_content_tree(),
+                         filters=filters,
+                         limit=limit,
+                         cursor=cursor,
+                         next_cursor=next_cursor)
+
+@app.route('/api/student/quizzes')
+def student_quizzes_api():
+    if 'user_id' not in session or session.get('role') != 'student':
+        return jsonify({"success": False, "message": "Unauthorized"}), 401
 
-    return render_template('student_quiz.html', assigned_quizzes=quizzes, subjects=subjects)
+    filters, limit, cursor = catalogue_args()
+    try:
+        quizzes, next_cursor = catalogue_page(session['user_id'], cursor=cursor, limit=limit, **filters)
+    except ValueError:
+        return jsonify({"success": False, "message": "Invalid filter or page cursor"}), 400
+
+    for quiz in quizzes:
+        quiz['assigned_at'] = quiz['assigned_at'].isoformat()
+        quiz['completed_at'] = quiz['completed_at'].isoformat() if quiz['completed_at'] else None
+    return jsonify({
+        "success": True,
+        "quizzes": quizzes,
+        "filters": filters,
+        "limit": limit,
+        "next_cursor": next_cursor
+    })
 
 @app.route('/admin_quiz')
 def admin_quiz():
@@ -248,18 +421,8 @@ def admin_quiz():
     
     # Get all users with their average performance
     users = User.query.filter_by(role='student').all()
-    user_performance = {}
-    
-    for user in users:
-        # Get all completed quizzes for this user
-        completed_quizzes = UserQuizzes.query.filter_by(user_id=user.id, completed=True).all()
-        if completed_quizzes:
-            # Calculate average score
-            total_score = sum(quiz.score for quiz in completed_quizzes)
-            average_score = total_score / len(completed_quizzes)
-            user_performance[user.id] = round(average_score, 1)
-        else:
-            user_performance[user.id] = 0
+    averages = average_scores()
+    user_performance = {user.id: averages.get(user.id, 0) for user in users}
     
     return render_template('admin_quiz.html', 
                          subjects=subjects, 
@@ -279,19 +442,8 @@ def admin_users():
     
     # Get all users with their average performance
     users = User.query.all()
-    user_performance = {}
-    
-    for user in users:
-        if user.role == 'student':
-            # Get all completed quizzes for this user
-            completed_quizzes = UserQuizzes.query.filter_by(user_id=user.id, completed=True).all()
-            if completed_quizzes:
-                # Calculate average score
-                total_score = sum(quiz.score for quiz in completed_quizzes)
-                average_score = total_score / len(completed_quizzes)
-                user_performance[user.id] = round(average_score, 1)
-            else:
-                user_performance[user.id] = 0
+    averages = average_scores()
+    user_performance = {user.id: averages.get(user.id, 0) for user in users if user.role == 'student'}
     
     quizzes = Quiz.query.all()
     return render_template('admin_users.html', users=users, quizzes=quizzes, user_performance=user_performance)
@@ -301,34 +453,8 @@ def admin_dashboard():
     if 'user_id' not in session or session.get('role') != 'admin':
         return redirect(url_for('login'))
     
-    # Get all subjects with their chapters
-    subjects = Subject.query.all()
-    subjects_data = []
-    
-    for subject in subjects:
-        chapters = Chapter.query.filter_by(subject_id=subject.id).order_by(Chapter.order).all()
-        chapters_data = []
-        
-        for chapter in chapters:
-            quizzes = Quiz.query.filter_by(chapter_id=chapter.id).all()
-            chapters_data.append({
-                'id': chapter.id,
-                'title': chapter.title,
-                'description': chapter.description,
-                'order': chapter.order,
-                'quizzes': [{
-                    'id': quiz.id,
-                    'title': quiz.title,
-                    'description': quiz.description,
-                    'duration': quiz.duration
-                } for quiz in quizzes]
-            })
-        
-        subjects_data.append({
-            'id': subject.id,
-            'name': subject.name,
-            'chapters': chapters_data
-        })
+    # Subject -> chapter -> quiz hierarchy, cached until content changes
+    subjects_data = get_content_tree()
     
     return render_template('admin_dashboard.html', subjects=subjects_data)
 
@@ -351,7 +477,22 @@ def add_question():
     if not all([quiz_id, title, options, correct_answer is not None]):
         return jsonify({"success": False, "message": "Missing required fields"}), 400
 
+    # Same rules as bulk import: a title and at least two non-empty string options
+    try:
+        title, options, correct_answer = parse_question(data)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
     try:
+        if app.config['DUPLICATE_QUESTION_CHECK'] and not data.get('allow_duplicate'):
+            duplicates = find_near_duplicates(title, options, threshold=app.config['DUPLICATE_QUESTION_THRESHOLD'])
+            if duplicates:
+                return jsonify({
+                    "success": False,
+                    "message": "Similar questions already exist",
+                    "duplicates": duplicates
+                }), 409
+
         new_question = Question(
             quiz_id=quiz_id,
             title=title,
@@ -359,12 +500,47 @@ def add_question():
             correct_answer=correct_answer
         )
         db.session.add(new_question)
+        db.session.flush()
+        index_question_bands([(new_question.id, title, options)])
+        adjust_question_count(quiz_id, 1)
+        bump_version(quiz_version_name(quiz_id))
         db.session.commit()
-        return jsonify({"success": True, "message": "Question added successfully"})
+        quiz_cache.invalidate(quiz_id)
+        return jsonify({"success": True, "message": "Question added successfully", "question_id": new_question.id})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"success": False, "message": str(e)}), 500
+
+@app.route('/import_questions/<int:quiz_id>', methods=['POST'])
+def import_questions_route(quiz_id):
+    if 'user_id' not in session or session.get('role') != 'admin':
+        return jsonify({"success": False, "message": "Unauthorized"}), 401
+
+    upload = request.files.get('file')
+    if not upload:
+        return jsonify({"success": False, "message": "A CSV or JSONL file is required"}), 400
+
+    fmt = detect_format(upload.filename, request.form.get('format'))
+    if not fmt:
+        return jsonify({"success": False, "message": "Format must be csv or jsonl"}), 400
+
+    if not db.session.get(Quiz, quiz_id):
+        return jsonify({"success": False, "message": "Quiz not found"}), 404
+
+    try:
+        summary = import_questions(quiz_id, upload.stream, fmt,
+                                   batch_size=app.config['IMPORT_BATCH_SIZE'],
+                                   max_errors=app.config['IMPORT_MAX_ERRORS'])
     except Exception as e:
         db.session.rollback()
         return jsonify({"success": False, "message": str(e)}), 500
 
+    return jsonify({
+        "success": not summary['aborted'],
+        "message": f"Imported {summary['imported']} questions, rejected {summary['rejected']}",
+        **summary
+    })
+
 @app.route('/edit_quiz', methods=['POST'])
 def edit_quiz():
     if 'user_id' not in session or session.get('role') != 'admin':
@@ -385,7 +561,10 @@ def edit_quiz():
 
         quiz.title = title
         quiz.description = description
+        bump_version()
+        bump_version(quiz_version_name(quiz.id))
         db.session.commit()
+        quiz_cache.invalidate(quiz.id)
 
         return jsonify({
             "success": True,
@@ -414,13 +593,22 @@ def delete_quiz():
 
     try:
         quiz = Quiz.query.get_or_404(quiz_id)
+        affected_users = [row.user_id for row in db.session.query(UserQuizzes.user_id).filter_by(quiz_id=quiz_id, completed=True)]
         # Delete all questions associated with the quiz
+        forget_questions(db.select(Question.id).where(Question.quiz_id == quiz_id))
         Question.query.filter_by(quiz_id=quiz_id).delete()
         # Delete all user assignments
         UserQuizzes.query.filter_by(quiz_id=quiz_id).delete()
         # Delete the quiz
+        forget_quiz(quiz)
         db.session.delete(quiz)
+        # Drop the deleted attempts from the affected students' rollups
+        if affected_users:
+            rebuild_user_performance(affected_users)
+        bump_version()
+        bump_version(quiz_version_name(quiz_id))
         db.session.commit()
+        quiz_cache.invalidate(quiz_id)
         return jsonify({"success": True, "message": "Quiz deleted successfully"})
     except Exception as e:
         db.session.rollback()
@@ -439,8 +627,12 @@ def delete_question():
 
     try:
         question = Question.query.get_or_404(question_id)
+        adjust_question_count(question.quiz_id, -1)
+        bump_version(quiz_version_name(question.quiz_id))
+        forget_questions([question.id])
         db.session.delete(question)
         db.session.commit()
+        quiz_cache.invalidate(question.quiz_id)
         return jsonify({"success": True, "message": "Question deleted successfully"})
     except Exception as e:
         db.session.rollback()
@@ -451,24 +643,28 @@ def get_quiz(quiz_id):
     if 'user_id' not in session:
         return jsonify({"success": False, "message": "Unauthorized"}), 401
 
-    try:
-        quiz = Quiz.query.get_or_404(quiz_id)
-        subject = Subject.query.get(quiz.subject_id)
-        questions = Question.query.filter_by(quiz_id=quiz_id).all()
+    def build():
+        quiz = quiz_metadata(quiz_id)
+        if not quiz:
+            return jsonify({"success": False, "message": "Quiz not found"}), 404
         
-        return jsonify({
+        return {
             "success": True,
             "quiz": {
-                "id": quiz.id,
-                "title": quiz.title,
-                "description": quiz.description,
-                "subject_name": subject.name if subject else "Unknown Subject",
-                "subject_id": quiz.subject_id,
-                "question_count": len(questions),
-                "question_ids": [q.id for q in questions],
-                "duration": quiz.duration
+                "id": quiz['id'],
+                "title": quiz['title'],
+                "description": quiz['description'],
+                "subject_name": quiz['subject_name'],
+                "subject_id": quiz['subject_id'],
+                "question_count": quiz['question_count'],
+                "question_ids": question_ids(quiz_id),
+                "duration": quiz['duration']
             }
-        })
+        }
+
+    try:
+        # 304 or a cached body while neither the content nor this quiz has changed
+        return cached_json((CONTENT, quiz_version_name(quiz_id)), build)
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
 
@@ -490,6 +686,7 @@ def create_subject():
             description=description
         )
         db.session.add(new_subject)
+        bump_version()
         db.session.commit()
         return jsonify({"success": True, "message": "Subject created successfully"})
     except Exception as e:
@@ -512,6 +709,11 @@ def create_quiz():
         if not all([subject_id, chapter_id, title, duration]):
             return jsonify({"success": False, "message": "Missing required fields"}), 400
 
+        # Quiz.subject_id is what stats and listings group by; it must match the chapter's subject
+        chapter = db.session.get(Chapter, chapter_id)
+        if chapter is None or chapter.subject_id != int(subject_id):
+            return jsonify({"success": False, "message": "Chapter does not belong to the selected subject"}), 400
+
         new_quiz = Quiz(
             title=title,
             description=description,
@@ -520,6 +722,7 @@ def create_quiz():
             duration=duration
         )
         db.session.add(new_quiz)
+        bump_version()
         db.session.commit()
 
         return jsonify({
@@ -550,90 +753,77 @@ def take_quiz(quiz_id):
         return redirect(url_for('student_quiz'))
     
     # Get quiz with its questions
-    quiz = Quiz.query.get_or_404(quiz_id)
+    quiz = get_compiled_quiz(quiz_id)
+    if quiz is None:
+        abort(404)
     if not quiz.questions:
         flash('No questions available for this quiz.', 'error')
         return redirect(url_for('student_quiz'))
     
     return render_template('take_quiz.html',
                          quiz=quiz,
-                         subject_name=quiz.subject.name if quiz.subject else "Unknown Subject",
+                         submission_key=uuid.uuid4().hex,
+                         subject_name=quiz.subject_name,
                          questions=quiz.questions,
                          current_question=1,
                          total_questions=len(quiz.questions))
 
+def flash_submission_result(status, score):
+    if status in ('submitted', 'duplicate'):
+        flash(f'Quiz submitted successfully! Your score: {score:.1f}%', 'success')
+    elif status == 'already_completed':
+        flash('You have already completed this quiz.', 'error')
+    else:
+        flash('Quiz not found or not assigned to you.', 'error')
+
 @app.route('/submit_quiz/<int:quiz_id>', methods=['POST'])
 def submit_quiz(quiz_id):
     if 'user_id' not in session or session.get('role') != 'student':
         return redirect(url_for('login'))
     
     user_id = session['user_id']
+    # Retries of the same submission carry the same key and get the stored result back
+    submission_key = (request.form.get('submission_key') or request.headers.get('Idempotency-Key') or '')[:64] or None
     user_quiz = UserQuizzes.query.filter_by(user_id=user_id, quiz_id=quiz_id).first()
     
     if not user_quiz:
-        flash('Quiz not found or not assigned to you.', 'error')
+        flash_submission_result('not_assigned', None)
         return redirect(url_for('student_quiz'))
     
     if user_quiz.completed:
-        flash('You have already completed this quiz.', 'error')
+        duplicate = submission_key is not None and user_quiz.submission_key == submission_key
+        flash_submission_result('duplicate' if duplicate else 'already_completed', user_quiz.score)
         return redirect(url_for('student_quiz'))
     
-    quiz = Quiz.query.get_or_404(quiz_id)
+    quiz = get_compiled_quiz(quiz_id)
+    if quiz is None:
+        abort(404)
     if not quiz.questions:
         flash('No questions available for this quiz.', 'error')
         return redirect(url_for('student_quiz'))
     
-    # Store answers and calculate score
-    answers = {}
-    correct_answers = 0
-    question_results = []
-    
-    for question in quiz.questions:
-        answer_key = f'answer_{question.id}'
-        if answer_key not in request.form:
+    # Grade the attempt against the compiled answer key
+    selected = []
+    for question_id in quiz.question_ids:
+        form_key = f'answer_{question_id}'
+        if form_key not in request.form:
             flash('Please answer all questions.', 'error')
             return redirect(url_for('take_quiz', quiz_id=quiz_id))
-        
-        selected_answer = int(request.form[answer_key])
-        is_correct = selected_answer == question.correct_answer
-        
-        # Store detailed information about each answer
-        answers[str(question.id)] = {
-            'selected_answer': selected_answer,
-            'correct_answer': question.correct_answer,
-            'is_correct': is_correct,
-            'question_title': question.title,
-            'options': question.options
-        }
-        
-        if is_correct:
-            correct_answers += 1
-            
-        question_results.append({
-            'question_id': question.id,
-            'is_correct': is_correct
-        })
+        selected.append(int(request.form[form_key]))
     
-    # Calculate score and accuracy metrics
-    total_questions = len(quiz.questions)
-    score = (correct_answers / total_questions) * 100
-    accuracy_data = {
-        'total_questions': total_questions,
-        'correct_answers': correct_answers,
-        'score_percentage': score,
-        'question_results': question_results
-    }
-    
-    # Update user quiz record
-    user_quiz.completed = True
-    user_quiz.completed_at = datetime.utcnow()
-    user_quiz.score = score
-    user_quiz.answers = answers
-    user_quiz.accuracy_data = accuracy_data
+    attempt = encode_attempt(list(quiz.question_ids), selected, quiz.answer_key, content_version=quiz.version)
+    score = (attempt['correct_count'] / attempt['total_questions']) * 100
     
-    db.session.commit()
+    # Claim the attempt with one conditional UPDATE; batched with concurrent submissions when enabled
+    if app.config['SUBMISSION_GROUP_COMMIT']:
+        status, score = submission_queue.submit(save_submission, user_id, quiz, attempt, score,
+                                                datetime.utcnow(), submission_key)
+    else:
+        status, score = save_submission(user_id, quiz, attempt, score, datetime.utcnow(), submission_key)
+        db.session.commit()
     
-    flash(f'Quiz submitted successfully! Your score: {score:.1f}%', 'success')
+    metrics.inc('quizzer_quiz_submissions_total', (('status', status),))
+    flash_submission_result(status, score)
     return redirect(url_for('student_quiz'))
 
 @app.route('/admin/quiz_results')
@@ -641,31 +831,48 @@ def admin_quiz_results():
     if 'user_id' not in session or session.get('role') != 'admin':
         return redirect(url_for('login'))
     
-    # Get all completed quizzes with user information
-    completed_quizzes = UserQuizzes.query.filter_by(completed=True).all()
-    
-    # Organize the data for display
-    quiz_results = []
-    for user_quiz in completed_quizzes:
-        quiz = user_quiz.quiz  # Get the associated quiz
-        result = {
-            'student_name': user_quiz.user.full_name,
-            'quiz_title': quiz.title,
-            'subject_name': quiz.subject.name,
-            'completed_at': user_quiz.completed_at,
-            'score': user_quiz.score,
-            'total_questions': len(quiz.questions),
-            'correct_answers': sum(1 for q in user_quiz.accuracy_data['question_results'] if q['is_correct']) if user_quiz.accuracy_data else 0,
-            'quiz_id': quiz.id,
-            'user_quiz_id': user_quiz.id,
-            'duration': quiz.duration
-        }
-        quiz_results.append(result)
+    filters = {
+        'subject_id': request.args.get('subject_id', type=int),
+        'quiz_id': request.args.get('quiz_id', type=int),
+        'student_id': request.args.get('student_id', type=int)
+    }
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+    cursor = request.args.get('cursor')
     
-    # Sort by completion date (newest first)
-    quiz_results.sort(key=lambda x: x['completed_at'], reverse=True)
+    # One page of completed attempts, newest first
+    try:
+        quiz_results, next_cursor = results_page(cursor=cursor, limit=limit, **filters)
+    except ValueError:
+        return "Invalid page cursor", 400
     
-    return render_template('admin_quiz_results.html', quiz_results=quiz_results)
+    return render_template('admin_quiz_results.html',
+                         quiz_results=quiz_results,
+                         subjects=get_content_tree(),
+                         filters=filters,
+                         limit=limit,
+                         cursor=cursor,
+                         next_cursor=next_cursor)
+
+@app.route('/admin/export_results')
+def admin_export_results():
+    if 'user_id' not in session or session.get('role') != 'admin':
+        return jsonify({"success": False, "message": "Unauthorized"}), 401
+
+    fmt = request.args.get('format', 'csv').lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"success": False, "message": "Format must be csv or jsonl"}), 400
+    try:
+        since, until = parse_date_range(request.args.get('from'), request.args.get('to'))
+    except ValueError:
+        return jsonify({"success": False, "message": "Dates must be YYYY-MM-DD"}), 400
+
+    # Rows are produced chunk by chunk while the response is being sent
+    chunks = export_results(fmt, subject_id=request.args.get('subject_id', type=int), since=since, until=until,
+                            chunk_size=app.config['EXPORT_CHUNK_SIZE'])
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    return app.response_class(stream_with_context(chunks), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename=quiz_results.{fmt}'
+    })
 
 @app.route('/admin/quiz_result_detail/<int:user_quiz_id>')
 def admin_quiz_result_detail(user_quiz_id):
@@ -674,19 +881,123 @@ def admin_quiz_result_detail(user_quiz_id):
     
     user_quiz = UserQuizzes.query.get_or_404(user_quiz_id)
     
-    # Get detailed information about the quiz attempt
+    # Rebuild the per-question view from the compact attempt encoding
+    answers, accuracy_data = attempt_view(user_quiz)
     quiz_detail = {
         'student_name': user_quiz.user.full_name,
         'quiz_title': user_quiz.quiz.title,
         'subject_name': user_quiz.quiz.subject.name,
         'completed_at': user_quiz.completed_at,
         'score': user_quiz.score,
-        'answers': user_quiz.answers,
-        'accuracy_data': user_quiz.accuracy_data
+        'answers': answers,
+        'accuracy_data': accuracy_data,
+        'content_changed': user_quiz.content_version is not None and
+                           user_quiz.content_version != get_version(quiz_version_name(user_quiz.quiz_id))
     }
     
     return render_template('admin_quiz_result_detail.html', quiz_detail=quiz_detail)
 
+@app.route('/admin/question_stats/<int:quiz_id>')
+def admin_question_stats(quiz_id):
+    if 'user_id' not in session or session.get('role') != 'admin':
+        return jsonify({"success": False, "message": "Unauthorized"}), 401
+
+    return jsonify({
+        "success": True,
+        "quiz_id": quiz_id,
+        "questions": quiz_question_report(quiz_id)
+    })
+
+@app.route('/admin/search_questions')
+def admin_search_questions():
+    if 'user_id' not in session or session.get('role') != 'admin':
+        return jsonify({"success": False, "message": "Unauthorized"}), 401
+
+    query = request.args.get('q', '').strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), app.config['SEARCH_MAX_PER_PAGE'])
+    results, has_more = search_questions(query,
+                                         quiz_id=request.args.get('quiz_id', type=int),
+                                         subject_id=request.args.get('subject_id', type=int),
+                                         page=page, per_page=per_page)
+    return jsonify({
+        "success": True,
+        "query": query,
+        "page": page,
+        "per_page": per_page,
+        "has_more": has_more,
+        "results": results
+    })
+
+@app.route('/regrade_quiz', methods=['POST'])
+def regrade_quiz_route():
+    if 'user_id' not in session or session.get('role') != 'admin':
+        return jsonify({"success": False, "message": "Unauthorized"}), 401
+
+    data = request.get_json() or {}
+    quiz_id = data.get('quiz_id')
+    corrections = data.get('corrections') or {}
+
+    if not quiz_id:
+        return jsonify({"success": False, "message": "Quiz ID is required"}), 400
+
+    # Corrections map question IDs to option indexes, e.g. {"12": 2}
+    if not isinstance(corrections, dict):
+        return jsonify({"success": False, "message": "Corrections must map question IDs to option indexes"}), 400
+    try:
+        corrections = {int(question_id): int(answer) for question_id, answer in corrections.items()}
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "message": "Corrections must map question IDs to option indexes"}), 400
+
+    quiz = db.session.get(Quiz, quiz_id)
+    if not quiz:
+        return jsonify({"success": False, "message": "Quiz not found"}), 404
+
+    try:
+        # Apply any answer-key fixes before rescoring
+        if corrections:
+            questions = Question.query.filter(
+                Question.quiz_id == quiz.id,
+                Question.id.in_(list(corrections))
+            ).all()
+            if len(questions) != len(corrections):
+                return jsonify({"success": False, "message": "Corrections must name questions of this quiz"}), 400
+            for question in questions:
+                correct_answer = corrections[question.id]
+                if not 0 <= correct_answer < len(question.options):
+                    return jsonify({"success": False, "message": f"Invalid correct answer for question {question.id}"}), 400
+                question.correct_answer = correct_answer
+            db.session.flush()
+            bump_version(quiz_version_name(quiz.id))
+
+        attempts, changed = regrade_quiz(quiz, chunk_size=app.config['REGRADE_CHUNK_SIZE'])
+        db.session.commit()
+        quiz_cache.invalidate(quiz.id)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"success": False, "message": str(e)}), 500
+
+    return jsonify({
+        "success": True,
+        "message": f"Regraded {attempts} attempts, {changed} scores changed",
+        "attempts": attempts,
+        "changed": changed
+    })
+
+@app.route('/admin/cache_stats')
+def admin_cache_stats():
+    if 'user_id' not in session or session.get('role') != 'admin':
+        return jsonify({"success": False, "message": "Unauthorized"}), 401
+
+    return jsonify({"success": True, "quiz_cache": quiz_cache.stats(), "response_cache": response_cache.stats()})
+
+@app.route('/metrics')
+def metrics_endpoint():
+    if 'user_id' not in session or session.get('role') != 'admin':
+        return jsonify({"success": False, "message": "Unauthorized"}), 401
+
+    return app.response_class(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/create_chapter', methods=['POST'])
 def create_chapter():
     if 'user_id' not in session or session.get('role') != 'admin':
@@ -709,6 +1020,7 @@ def create_chapter():
             order=order
         )
         db.session.add(new_chapter)
+        bump_version()
         db.session.commit()
 
         return jsonify({
@@ -733,7 +1045,9 @@ def delete_chapter(chapter_id):
 
     try:
         chapter = Chapter.query.get_or_404(chapter_id)
+        forget_chapter(chapter)
         db.session.delete(chapter)
+        bump_version()
         db.session.commit()
         return jsonify({"success": True, "message": "Chapter deleted successfully"})
     except Exception as e:
@@ -753,6 +1067,7 @@ def edit_chapter(chapter_id):
         chapter.description = data.get('description', chapter.description)
         chapter.order = data.get('order', chapter.order)
         
+        bump_version()
         db.session.commit()
         return jsonify({
             "success": True,
@@ -771,15 +1086,18 @@ def edit_chapter(chapter_id):
 
 @app.route('/get_chapters/<int:subject_id>')
 def get_chapters(subject_id):
-    try:
-        chapters = Chapter.query.filter_by(subject_id=subject_id).order_by(Chapter.order).all()
-        return jsonify({
+    def build():
+        chapters = get_subject_chapters(subject_id)
+        return {
             'success': True,
             'chapters': [{
-                'id': chapter.id,
-                'title': chapter.title
+                'id': chapter['id'],
+                'title': chapter['title']
             } for chapter in chapters]
-        })
+        }
+
+    try:
+        return cached_json((CONTENT,), build)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -801,14 +1119,15 @@ def delete_user():
     if not user:
         return jsonify({'success': False, 'message': 'User not found'}), 404
     
-    if user.is_admin:
+    if user.role == 'admin':
         return jsonify({'success': False, 'message': 'Cannot delete admin users'}), 400
     
     try:
-        # Delete user's quiz attempts
-        UserQuizzes.query.filter_by(user_id=user_id).delete()
-        # Delete user's assignments
-        UserAssignments.query.filter_by(user_id=user_id).delete()
+        # Take the user's attempts out of the totals, then delete attempts and assignments
+        forget_user_attempts(user.id)
+        forget_user_question_results(user.id)
+        UserQuizzes.query.filter_by(user_id=user.id).delete()
+        rebuild_user_performance([user.id])
         # Delete the user
         db.session.delete(user)
         db.session.commit()
@@ -824,58 +1143,22 @@ def summary():
     
     user_id = session['user_id']
     
-    # Get subject-wise performance
-    subject_performance = []
-    subjects = Subject.query.all()
-    subject_labels = []
-    subject_scores = []
-    
-    for subject in subjects:
-        subject_quizzes = UserQuizzes.query.join(Quiz).join(Chapter).filter(
-            UserQuizzes.user_id == user_id,
-            UserQuizzes.completed == True,
-            Chapter.subject_id == subject.id
-        ).all()
-        
-        if subject_quizzes:
-            avg_score = sum(quiz.score for quiz in subject_quizzes) / len(subject_quizzes)
-            subject_labels.append(subject.name)
-            subject_scores.append(round(avg_score, 2))
-    
-    # Get chapter-wise performance
-    chapter_performance = []
-    chapters = Chapter.query.all()
-    chapter_labels = []
-    chapter_scores = []
-    
-    for chapter in chapters:
-        chapter_quizzes = UserQuizzes.query.join(Quiz).filter(
-            UserQuizzes.user_id == user_id,
-            UserQuizzes.completed == True,
-            Quiz.chapter_id == chapter.id
-        ).all()
-        
-        if chapter_quizzes:
-            avg_score = sum(quiz.score for quiz in chapter_quizzes) / len(chapter_quizzes)
-            chapter_labels.append(chapter.title)
-            chapter_scores.append(round(avg_score, 2))
-    
-    # Get performance over time
-    time_quizzes = UserQuizzes.query.filter_by(
-        user_id=user_id,
-        completed=True
-    ).order_by(UserQuizzes.completed_at).all()
-    
-    time_labels = []
-    time_scores = []
-    cumulative_scores = []
-    total_score = 0
-    
-    for i, quiz in enumerate(time_quizzes):
-        total_score += quiz.score
-        avg_score = total_score / (i + 1)
-        time_labels.append(quiz.completed_at.strftime('%Y-%m-%d'))
-        time_scores.append(round(avg_score, 2))
+    # Get subject-wise and chapter-wise performance
+    subject_rows = subject_averages(user_id)
+    subject_labels = [name for name, _ in subject_rows]
+    subject_scores = [score for _, score in subject_rows]
+    
+    chapter_rows = chapter_averages(user_id)
+    chapter_labels = [title for title, _ in chapter_rows]
+    chapter_scores = [score for _, score in chapter_rows]
+    
+    # Get performance over time; long histories are plotted per day from the rollup
+    if attempt_count(user_id) > app.config['SUMMARY_DAILY_ROLLUP_THRESHOLD']:
+        time_rows = daily_running_averages(user_id)
+    else:
+        time_rows = running_averages(user_id)
+    time_labels = [label for label, _ in time_rows]
+    time_scores = [score for _, score in time_rows]
     
     return render_template('summary.html',
                          subject_labels=subject_labels,
@@ -885,5 +1168,226 @@ def summary():
                          time_labels=time_labels,
                          time_scores=time_scores)
 
+@app.cli.command('rebuild-performance')
+def rebuild_performance_command():
+    """Regenerate the per-student performance rollup from scratch."""
+    count = rebuild_user_performance()
+    db.session.commit()
+    print(f"Rebuilt performance rollup for {count} students")
+
+@app.cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """Regenerate the subject/chapter/quiz aggregates and student rollups from scratch."""
+    rebuild_stats()
+    db.session.commit()
+    print("Rebuilt stats aggregates")
+
+@app.cli.command('check-stats')
+def check_stats_command():
+    """Compare the stats aggregates against a full recompute."""
+    mismatches = check_stats_consistency()
+    for scope, entity_id, stored, expected in mismatches:
+        print(f"{scope} {entity_id}: stored {stored}, expected {expected}")
+    if mismatches:
+        raise SystemExit(f"{len(mismatches)} aggregate rows out of date; run 'flask rebuild-stats'")
+    print("Stats aggregates are consistent")
+
+@app.cli.command('migrate')
+def migrate_command():
+    """Apply pending schema migrations."""
+    applied = upgrade()
+    if applied:
+        print(f"Applied migrations: {', '.join(str(version) for version in applied)}")
+    print(f"Schema version: {get_schema_version()}")
+
+@app.cli.command('query-plans')
+def query_plans_command():
+    """Print SQLite's query plan for each hot query."""
+    for name, plan in explain_hot_queries().items():
+        print(name)
+        for line in plan:
+            print(f"    {line}")
+
+@app.cli.command('import-questions')
+@click.argument('quiz_id', type=int)
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help='Defaults to the file extension.')
+@click.option('--batch-size', default=1000, show_default=True)
+def import_questions_command(quiz_id, path, fmt, batch_size):
+    """Stream questions from a CSV or JSONL file into a quiz."""
+    fmt = detect_format(path, fmt)
+    if not fmt:
+        raise SystemExit("Cannot tell the file format; pass --format csv or --format jsonl")
+    if not db.session.get(Quiz, quiz_id):
+        raise SystemExit(f"Quiz {quiz_id} not found")
+    with open(path, 'rb') as source:
+        summary = import_questions(quiz_id, source, fmt, batch_size=batch_size,
+                                   max_errors=app.config['IMPORT_MAX_ERRORS'])
+    for error in summary['errors']:
+        print(f"line {error['line']}: {error['message']}")
+    print(f"Imported {summary['imported']} questions, rejected {summary['rejected']}")
+    if summary['aborted']:
+        raise SystemExit(1)
+
+@app.cli.command('rebuild-question-counts')
+def rebuild_question_counts_command():
+    """Recount the stored question count of every quiz."""
+    rebuild_question_counts()
+    db.session.commit()
+    print("Rebuilt quiz question counts")
+
+@app.cli.command('answer-storage-report')
+@click.option('--limit', default=10000, show_default=True, help='Most recent attempts to measure.')
+def answer_storage_report_command(limit):
+    """Report how much smaller the compact attempt encoding is than the legacy JSON."""
+    report = storage_report(limit)
+    print(f"Attempts measured: {report['attempts']}")
+    print(f"Legacy JSON bytes: {report['legacy_bytes']}")
+    print(f"Compact bytes:     {report['compact_bytes']}")
+    print(f"Size reduction:    {report['reduction']:.1%}")
+
+@app.cli.command('rebuild-question-stats')
+def rebuild_question_stats_command():
+    """Recompute per-question difficulty and discrimination sums from stored attempts."""
+    rebuild_question_stats()
+    db.session.commit()
+    print("Rebuilt question statistics")
+
+@app.cli.command('regrade-quiz')
+@click.argument('quiz_id', type=int)
+def regrade_quiz_command(quiz_id):
+    """Rescore every completed attempt of a quiz against its current answer key."""
+    quiz = db.session.get(Quiz, quiz_id)
+    if not quiz:
+        raise SystemExit(f"Quiz {quiz_id} not found")
+    attempts, changed = regrade_quiz(quiz, chunk_size=app.config['REGRADE_CHUNK_SIZE'])
+    db.session.commit()
+    print(f"Regraded {attempts} attempts, {changed} scores changed")
+
+@app.cli.command('bench-login')
+@click.option('--username', default='admin1', show_default=True)
+@click.option('--password', default='admin', show_default=True)
+@click.option('--role', default='admin', show_default=True)
+@click.option('--requests', 'total', default=200, show_default=True, help='Logins to perform')
+@click.option('--concurrency', default=8, show_default=True, help='Concurrent clients')
+def bench_login_command(username, password, role, total, concurrency):
+    """Measure /login throughput and latency with concurrent clients."""
+    def login_once(_):
+        client = app.test_client()
+        started = time.perf_counter()
+        response = client.post('/login', data={'username': username, 'password': password, 'role': role})
+        return response.status_code, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(login_once, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for _, latency in results)
+    failures = sum(1 for status, _ in results if status != 302)
+    print(f"method {app.config['PASSWORD_HASH_METHOD']}, {app.config['PASSWORD_HASH_WORKERS']} hash workers, "
+          f"{concurrency} clients")
+    print(f"{total} logins in {elapsed:.2f}s: {total / elapsed:.1f}/s, {failures} failed")
+    print(f"p50 {latencies[len(latencies) // 2] * 1000:.1f}ms, "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f}ms")
+
+@app.cli.command('seed-synthetic')
+@click.option('--subjects', default=5, show_default=True)
+@click.option('--chapters-per-subject', default=8, show_default=True)
+@click.option('--quizzes-per-chapter', default=5, show_default=True)
+@click.option('--questions-per-quiz', default=10, show_default=True)
+@click.option('--students', default=500, show_default=True)
+@click.option('--attempts-per-student', default=20, show_default=True, help='Completed attempts per student')
+@click.option('--pending-per-student', default=2, show_default=True, help='Open assignments per student')
+@click.option('--seed', default=1, show_default=True, help='Random seed; also tags the generated names')
+def seed_synthetic_command(subjects, chapters_per_subject, quizzes_per_chapter, questions_per_quiz,
+                           students, attempts_per_student, pending_per_student, seed):
+    """Fill the database with synthetic content, students and attempts."""
+    created = generate_dataset(subjects=subjects, chapters_per_subject=chapters_per_subject,
+                               quizzes_per_chapter=quizzes_per_chapter, questions_per_quiz=questions_per_quiz,
+                               students=students, attempts_per_student=attempts_per_student,
+                               pending_per_student=pending_per_student, seed=seed,
+                               progress=lambda done, total: print(f"Seeded {done}/{total} students"))
+    print(', '.join(f"{count} {name}" for name, count in created.items()))
+
+@app.cli.command('bench-routes')
+@click.option('--iterations', default=20, show_default=True, help='Requests per read route and write cycles')
+@click.option('--output', type=click.Path(dir_okay=False), help='Write the results as JSON to this file')
+@click.option('--compare', 'baseline', type=click.Path(exists=True, dir_okay=False), help='Earlier results to compare against')
+def bench_routes_command(iterations, output, baseline):
+    """Time every route through the test client and count its SQL queries."""
+    results = RouteBenchmark(app, iterations=iterations).run()
+    for name, route in results['routes'].items():
+        print(f"{name:55} p50 {route['p50_ms']:8.2f}ms  p95 {route['p95_ms']:8.2f}ms  "
+              f"p99 {route['p99_ms']:8.2f}ms  queries {route['queries_p50']}")
+    if results['not_covered']:
+        print(f"Not covered: {', '.join(results['not_covered'])}")
+    if output:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {output}")
+    if baseline:
+        regressions = compare_results(load_results(baseline), results)
+        for line in regressions:
+            print(f"Regression: {line}")
+        if not regressions:
+            print("No regressions against the baseline")
+
+@app.cli.command('export-results')
+@click.argument('output', type=click.File('w', encoding='utf-8'))
+@click.option('--format', 'fmt', type=click.Choice(EXPORT_FORMATS), default='csv', show_default=True)
+@click.option('--subject-id', type=int, help='Only attempts on this subject')
+@click.option('--from', 'date_from', help='First day to include (YYYY-MM-DD)')
+@click.option('--to', 'date_to', help='Last day to include (YYYY-MM-DD)')
+def export_results_command(output, fmt, subject_id, date_from, date_to):
+    """Stream completed attempts to OUTPUT ('-' for stdout) as CSV or JSONL."""
+    try:
+        since, until = parse_date_range(date_from, date_to)
+    except ValueError:
+        raise click.BadParameter("Dates must be YYYY-MM-DD")
+    for chunk in export_results(fmt, subject_id=subject_id, since=since, until=until,
+                                chunk_size=app.config['EXPORT_CHUNK_SIZE']):
+        output.write(chunk)
+
+@app.cli.command('export-content')
+@click.argument('path', type=click.Path(dir_okay=False))
+def export_content_command(path):
+    """Write every subject, chapter, quiz and question to a gzipped JSONL snapshot."""
+    counts = export_content(path)
+    print(f"Exported to {path}: {', '.join(f'{kind} {count}' for kind, count in counts.items())}")
+
+@app.cli.command('import-content')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--remap-out', type=click.Path(dir_okay=False), help='Write the snapshot id -> new id map as JSON')
+def import_content_command(path, remap_out):
+    """Bulk load a content snapshot as new rows."""
+    started = time.perf_counter()
+    try:
+        counts, remap = import_content(path)
+    except SnapshotError as e:
+        raise SystemExit(f"Import failed: {e}")
+    print(f"Imported in {time.perf_counter() - started:.2f}s: "
+          f"{', '.join(f'{kind} {count}' for kind, count in counts.items())}")
+    if remap_out:
+        with open(remap_out, 'w') as f:
+            json.dump(remap, f)
+        print(f"ID map written to {remap_out}")
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Rebuild the full-text question index and the near-duplicate buckets."""
+    started = time.perf_counter()
+    rebuild_search_index(db.session.connection())
+    rebuild_question_bands()
+    db.session.commit()
+    print(f"Rebuilt question search index in {time.perf_counter() - started:.2f}s")
+
+@app.cli.command('sqlite-settings')
+def sqlite_settings_command():
+    """Print the journal mode, synchronous level and busy timeout in effect."""
+    with db.engine.connect() as conn:
+        for name, value in sqlite_settings(conn).items():
+            print(f"{name}: {value}")
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,330 @@
+from datetime import datetime
+from sqlalchemy import inspect, text
+from models import db
+
+# Versioned schema changes, applied in order. Each step receives a connection
+# inside its own transaction and must leave existing rows intact.
+
+# The schema the application shipped with before migrations existed. Frozen:
+# later tables and columns belong to their own migrations.
+_BASELINE_TABLES = (
+    """CREATE TABLE IF NOT EXISTS subject (
+        id INTEGER NOT NULL,
+        name VARCHAR(100) NOT NULL,
+        description TEXT,
+        created_at DATETIME,
+        PRIMARY KEY (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS user (
+        id INTEGER NOT NULL,
+        full_name VARCHAR(100) NOT NULL,
+        email VARCHAR(120) NOT NULL,
+        username VARCHAR(80) NOT NULL,
+        password VARCHAR(255) NOT NULL,
+        role VARCHAR(20) NOT NULL,
+        qualification VARCHAR(100),
+        date_of_birth DATE,
+        PRIMARY KEY (id),
+        UNIQUE (email),
+        UNIQUE (username)
+    )""",
+    """CREATE TABLE IF NOT EXISTS chapter (
+        id INTEGER NOT NULL,
+        title VARCHAR(100) NOT NULL,
+        description TEXT,
+        subject_id INTEGER NOT NULL,
+        "order" INTEGER NOT NULL,
+        created_at DATETIME,
+        PRIMARY KEY (id),
+        FOREIGN KEY(subject_id) REFERENCES subject (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS quiz (
+        id INTEGER NOT NULL,
+        title VARCHAR(100) NOT NULL,
+        description TEXT,
+        subject_id INTEGER NOT NULL,
+        chapter_id INTEGER NOT NULL,
+        duration INTEGER NOT NULL,
+        PRIMARY KEY (id),
+        FOREIGN KEY(subject_id) REFERENCES subject (id),
+        FOREIGN KEY(chapter_id) REFERENCES chapter (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS question (
+        id INTEGER NOT NULL,
+        quiz_id INTEGER NOT NULL,
+        title VARCHAR(500) NOT NULL,
+        options JSON NOT NULL,
+        correct_answer INTEGER NOT NULL,
+        created_at DATETIME,
+        PRIMARY KEY (id),
+        FOREIGN KEY(quiz_id) REFERENCES quiz (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS user_quizzes (
+        id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        quiz_id INTEGER NOT NULL,
+        assigned_at DATETIME NOT NULL,
+        completed BOOLEAN,
+        completed_at DATETIME,
+        score FLOAT,
+        answers JSON,
+        accuracy_data JSON,
+        PRIMARY KEY (id),
+        FOREIGN KEY(user_id) REFERENCES user (id),
+        FOREIGN KEY(quiz_id) REFERENCES quiz (id)
+    )""",
+)
+
+
+# Columns that copies of the database older than the baseline may lack, as
+# (table, column, type); ALTER TABLE cannot add them with their constraints
+_BASELINE_COLUMNS = (
+    ('user_quizzes', 'assigned_at', 'DATETIME'),
+    ('user_quizzes', 'completed', 'BOOLEAN'),
+    ('user_quizzes', 'completed_at', 'DATETIME'),
+    ('user_quizzes', 'score', 'FLOAT'),
+    ('user_quizzes', 'answers', 'JSON'),
+    ('user_quizzes', 'accuracy_data', 'JSON'),
+    ('quiz', 'description', 'TEXT'),
+    ('quiz', 'subject_id', 'INTEGER'),
+    ('quiz', 'chapter_id', 'INTEGER'),
+    ('quiz', 'duration', 'INTEGER'),
+    ('question', 'created_at', 'DATETIME'),
+)
+
+
+def _create_baseline_tables(conn):
+    # Adopt a database created before migrations existed: add the baseline
+    # tables, then the baseline columns older copies did not have
+    for statement in _BASELINE_TABLES:
+        conn.execute(text(statement))
+    for table, column, column_type in _BASELINE_COLUMNS:
+        if not _has_column(conn, table, column):
+            conn.execute(text(f'ALTER TABLE {table} ADD COLUMN "{column}" {column_type}'))
+
+
+def _add_hot_path_indexes(conn):
+    # Keep one assignment per (user, quiz) before enforcing uniqueness,
+    # preferring a completed attempt over a pending one
+    conn.execute(text("""
+        DELETE FROM user_quizzes WHERE id NOT IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY user_id, quiz_id ORDER BY completed DESC, id
+                ) AS position
+                FROM user_quizzes
+            ) WHERE position = 1
+        )
+    """))
+    conn.execute(text('CREATE UNIQUE INDEX IF NOT EXISTS ux_user_quizzes_user_quiz ON user_quizzes (user_id, quiz_id)'))
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_user_quizzes_completed_at ON user_quizzes (completed, completed_at)'))
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_question_quiz_id ON question (quiz_id)'))
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_chapter_subject_order ON chapter (subject_id, "order")'))
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_quiz_chapter_id ON quiz (chapter_id)'))
+
+
+def _has_column(conn, table, column):
+    return any(existing['name'] == column for existing in inspect(conn).get_columns(table))
+
+
+def _add_quiz_question_count(conn):
+    if not _has_column(conn, 'quiz', 'question_count'):
+        conn.execute(text('ALTER TABLE quiz ADD COLUMN question_count INTEGER NOT NULL DEFAULT 0'))
+    conn.execute(text(
+        'UPDATE quiz SET question_count = (SELECT COUNT(*) FROM question WHERE question.quiz_id = quiz.id)'
+    ))
+
+
+def _compact_attempt_answers(conn):
+    from services.attempts import legacy_to_compact
+
+    for column, column_type in (('content_version', 'INTEGER'), ('question_ids', 'BLOB'),
+                                ('selected_answers', 'BLOB'), ('answer_key', 'BLOB'),
+                                ('correct_count', 'INTEGER'), ('total_questions', 'INTEGER')):
+        if not _has_column(conn, 'user_quizzes', column):
+            conn.execute(text(f'ALTER TABLE user_quizzes ADD COLUMN {column} {column_type}'))
+
+    # Convert completed attempts in id order, a chunk at a time
+    last_id = 0
+    while True:
+        rows = conn.execute(text(
+            'SELECT id, answers, accuracy_data FROM user_quizzes '
+            'WHERE answers IS NOT NULL AND id > :last_id ORDER BY id LIMIT 500'
+        ), {'last_id': last_id}).all()
+        if not rows:
+            break
+        conn.execute(text(
+            'UPDATE user_quizzes SET content_version = :content_version, question_ids = :question_ids, '
+            'selected_answers = :selected_answers, answer_key = :answer_key, correct_count = :correct_count, '
+            'total_questions = :total_questions, answers = NULL, accuracy_data = NULL WHERE id = :id'
+        ), [dict(legacy_to_compact(row.answers, row.accuracy_data), id=row.id) for row in rows])
+        last_id = rows[-1].id
+
+
+def _add_question_stats_tables(conn):
+    from models import QuestionStats, QuestionOptionStats
+
+    db.metadata.create_all(bind=conn, tables=[QuestionStats.__table__, QuestionOptionStats.__table__])
+
+
+def _add_submission_key(conn):
+    if not _has_column(conn, 'user_quizzes', 'submission_key'):
+        conn.execute(text('ALTER TABLE user_quizzes ADD COLUMN submission_key VARCHAR(64)'))
+
+
+def _add_question_search(conn):
+    from models import Question, QuestionBand
+    from services.question_search import (create_search_index, rebuild_search_index, question_band_rows,
+                                          insert_question_bands)
+
+    db.metadata.create_all(bind=conn, tables=[QuestionBand.__table__])
+    create_search_index(conn)
+    rebuild_search_index(conn)
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            db.select(Question.id, Question.title, Question.options)
+            .where(Question.id > last_id).order_by(Question.id).limit(2000)
+        ).all()
+        if not rows:
+            break
+        insert_question_bands(conn, question_band_rows(rows))
+        last_id = rows[-1].id
+
+
+def _add_catalogue_index(conn):
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_user_quizzes_user_assigned ON user_quizzes (user_id, assigned_at)'))
+
+
+def _add_rollup_tables(conn):
+    from models import UserPerformance, ContentVersion, UserDailyPerformance, PerformanceAggregate
+
+    # Databases adopted before this step got these tables empty; REBUILDS refills them
+    db.metadata.create_all(bind=conn, tables=[UserPerformance.__table__, ContentVersion.__table__,
+                                              UserDailyPerformance.__table__, PerformanceAggregate.__table__])
+
+
+def _align_quiz_subjects(conn):
+    # Quiz.subject_id is the subject every report groups by; older rows could disagree with the chapter
+    conn.execute(text(
+        'UPDATE quiz SET subject_id = (SELECT subject_id FROM chapter WHERE chapter.id = quiz.chapter_id) '
+        'WHERE subject_id != (SELECT subject_id FROM chapter WHERE chapter.id = quiz.chapter_id)'
+    ))
+
+
+MIGRATIONS = [
+    (1, 'Baseline tables', _create_baseline_tables),
+    (2, 'Hot-path indexes and unique quiz assignments', _add_hot_path_indexes),
+    (3, 'Denormalized Quiz.question_count', _add_quiz_question_count),
+    (4, 'Compact attempt answer encoding', _compact_attempt_answers),
+    (5, 'Per-question statistics tables', _add_question_stats_tables),
+    (6, 'Idempotency key for quiz submissions', _add_submission_key),
+    (7, 'Full-text question index and near-duplicate buckets', _add_question_search),
+    (8, 'Student quiz catalogue index', _add_catalogue_index),
+    (9, 'Performance rollup and aggregate tables', _add_rollup_tables),
+    (10, "Quiz subject follows its chapter's subject", _align_quiz_subjects),
+]
+
+# Tables derived from stored attempts that a migration leaves empty or stale.
+# They are recomputed once, after every pending step has been applied.
+REBUILDS = {
+    5: 'question_stats',
+    9: 'stats',
+    10: 'stats',
+}
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def _ensure_version_table(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description VARCHAR(200) NOT NULL,
+            applied_at DATETIME NOT NULL
+        )
+    """))
+
+
+def _stamp(conn, version, description):
+    conn.execute(
+        text('INSERT INTO schema_version (version, description, applied_at) VALUES (:version, :description, :applied_at)'),
+        {'version': version, 'description': description, 'applied_at': datetime.utcnow()}
+    )
+
+
+def get_schema_version():
+    """Return the highest applied migration version (0 for an unmanaged database)."""
+    with db.engine.begin() as conn:
+        _ensure_version_table(conn)
+        return conn.execute(text('SELECT MAX(version) FROM schema_version')).scalar() or 0
+
+
+def upgrade():
+    """Apply every pending migration, one transaction each. Returns the versions applied."""
+    applied = []
+    with db.engine.begin() as conn:
+        _ensure_version_table(conn)
+        has_data_tables = any(name != 'schema_version' for name in inspect(conn).get_table_names())
+        current = conn.execute(text('SELECT MAX(version) FROM schema_version')).scalar() or 0
+
+        # A brand new database gets the current models directly
+        if current == 0 and not has_data_tables:
+            from services.question_search import create_search_index
+
+            db.metadata.create_all(bind=conn)
+            # The FTS table and its triggers are not part of the models
+            create_search_index(conn)
+            for version, description, _ in MIGRATIONS:
+                _stamp(conn, version, description)
+            return [version for version, _, _ in MIGRATIONS]
+
+    for version, description, step in MIGRATIONS:
+        if version <= current:
+            continue
+        with db.engine.begin() as conn:
+            step(conn)
+            _stamp(conn, version, description)
+        applied.append(version)
+    _rebuild_derived({REBUILDS[version] for version in applied if version in REBUILDS})
+    return applied
+
+
+def _rebuild_derived(names):
+    from services.stats import rebuild_stats
+    from services.question_stats import rebuild_question_stats
+
+    if not names:
+        return
+    try:
+        if 'stats' in names:
+            rebuild_stats()
+        if 'question_stats' in names:
+            rebuild_question_stats()
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        raise RuntimeError(
+            f"Schema migrated but rebuilding statistics failed ({e}); "
+            "run 'flask rebuild-stats' and 'flask rebuild-question-stats'"
+        ) from e
+
+
+def ensure_schema(auto_migrate=True):
+    """Check the schema version at startup without rebuilding the database.
+
+    Pending migrations are applied when ``auto_migrate`` is set; otherwise
+    startup fails with a message pointing at ``flask migrate``.
+    """
+    current = get_schema_version()
+    if current > LATEST_VERSION:
+        raise RuntimeError(
+            f"Database schema version {current} is newer than this code ({LATEST_VERSION})"
+        )
+    if current < LATEST_VERSION:
+        if not auto_migrate:
+            raise RuntimeError(
+                f"Database schema version {current} is behind {LATEST_VERSION}; run 'flask migrate'"
+            )
+        upgrade()
+    return LATEST_VERSION
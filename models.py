@@ -33,6 +33,10 @@ class Chapter(db.Model):
     subject_id = db.Column(db.Integer, db.ForeignKey('subject.id'), nullable=False)
     order = db.Column(db.Integer, nullable=False)  # For maintaining chapter order
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_chapter_subject_order', 'subject_id', 'order'),
+    )
     
     # Relationship with Quiz
     quizzes = db.relationship('Quiz', backref='chapter', lazy=True, cascade='all, delete-orphan')
@@ -45,8 +49,13 @@ class Quiz(db.Model):
     subject_id = db.Column(db.Integer, db.ForeignKey('subject.id'), nullable=False)
     chapter_id = db.Column(db.Integer, db.ForeignKey('chapter.id'), nullable=False)
     duration = db.Column(db.Integer, nullable=False)  # Duration in minutes
+    question_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Kept in step with Question rows
     questions = db.relationship('Question', backref='quiz', lazy=True, cascade='all, delete-orphan')
 
+    __table_args__ = (
+        db.Index('ix_quiz_chapter_id', 'chapter_id'),
+    )
+
 # UserQuizzes Model (Many-to-Many)
 class UserQuizzes(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -56,12 +65,25 @@ class UserQuizzes(db.Model):
     completed = db.Column(db.Boolean, default=False)
     completed_at = db.Column(db.DateTime)
     score = db.Column(db.Float)
-    answers = db.Column(db.JSON)  # Stores detailed answer information
-    accuracy_data = db.Column(db.JSON)  # Stores accuracy metrics and question results
+    answers = db.Column(db.JSON)  # Legacy per-question copy; new attempts use the compact columns below
+    accuracy_data = db.Column(db.JSON)  # Legacy accuracy metrics; new attempts use the compact columns below
+    content_version = db.Column(db.Integer)  # Quiz content version the attempt was graded against
+    question_ids = db.Column(db.LargeBinary)  # Packed little-endian uint32 question ids, in quiz order
+    selected_answers = db.Column(db.LargeBinary)  # One byte per question: selected option index
+    answer_key = db.Column(db.LargeBinary)  # One byte per question: correct option index when graded
+    correct_count = db.Column(db.Integer)
+    total_questions = db.Column(db.Integer)
+    submission_key = db.Column(db.String(64))  # Idempotency key of the submission that completed the attempt
 
     user = db.relationship('User', backref=db.backref('assigned_quizzes', lazy=True))
     quiz = db.relationship('Quiz', backref=db.backref('assigned_to', lazy=True))
 
+    __table_args__ = (
+        db.Index('ux_user_quizzes_user_quiz', 'user_id', 'quiz_id', unique=True),  # One assignment per user and quiz
+        db.Index('ix_user_quizzes_completed_at', 'completed', 'completed_at'),
+        db.Index('ix_user_quizzes_user_assigned', 'user_id', 'assigned_at'),  # Student quiz catalogue, newest first
+    )
+
 # Question Model
 class Question(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -69,4 +91,62 @@ class Question(db.Model):
     title = db.Column(db.String(500), nullable=False)
     options = db.Column(db.JSON, nullable=False)  # Store options as JSON array
     correct_answer = db.Column(db.Integer, nullable=False)  # Index of correct answer in options array
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_question_quiz_id', 'quiz_id'),
+    )
+
+# UserPerformance Model (per-student rollup of completed attempts)
+class UserPerformance(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    attempt_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0)
+    average_score = db.Column(db.Float, nullable=False, default=0)
+    best_score = db.Column(db.Float)
+    last_attempt_at = db.Column(db.DateTime)
+
+# ContentVersion Model (monotonic counters used to invalidate in-process caches)
+class ContentVersion(db.Model):
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+# UserDailyPerformance Model (per-student, per-day rollup for long attempt histories)
+class UserDailyPerformance(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    attempt_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0)
+
+# PerformanceAggregate Model (running score totals per subject, chapter and quiz)
+class PerformanceAggregate(db.Model):
+    scope = db.Column(db.String(20), primary_key=True)  # 'subject', 'chapter' or 'quiz'
+    entity_id = db.Column(db.Integer, primary_key=True)
+    attempt_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0)
+
+# QuestionStats Model (running item-analysis sums per question)
+class QuestionStats(db.Model):
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), primary_key=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    correct_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0)  # Sum of attempt scores
+    score_sq_sum = db.Column(db.Float, nullable=False, default=0)  # Sum of squared attempt scores
+    correct_score_sum = db.Column(db.Float, nullable=False, default=0)  # Sum of attempt scores when answered correctly
+
+# QuestionOptionStats Model (how often each option of a question was picked)
+class QuestionOptionStats(db.Model):
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), primary_key=True)
+    option_index = db.Column(db.Integer, primary_key=True)
+    selected_count = db.Column(db.Integer, nullable=False, default=0)
+
+# QuestionBand Model (MinHash LSH buckets of question text, for near-duplicate lookups)
+class QuestionBand(db.Model):
+    band = db.Column(db.Integer, primary_key=True)
+    bucket = db.Column(db.BigInteger, primary_key=True)
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), primary_key=True)
+
+    __table_args__ = (
+        db.Index('ix_question_band_question_id', 'question_id'),
+        {'sqlite_with_rowid': False},
+    )
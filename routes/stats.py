@@ -0,0 +1,89 @@
+from flask import Blueprint, jsonify, session
+from models import db, User, Subject, Chapter, Quiz, UserPerformance
+from services.content_tree import get_content_tree
+from services.stats import averages
+from services.response_cache import cached_json
+from services.versions import CONTENT, RESULTS
+
+stats_bp = Blueprint('stats_api', __name__, url_prefix='/api/stats')
+
+
+@stats_bp.before_request
+def require_admin():
+    if 'user_id' not in session or session.get('role') != 'admin':
+        return jsonify({"success": False, "message": "Unauthorized"}), 401
+
+
+@stats_bp.route('/subject-performance')
+def subject_performance():
+    def build():
+        scores = averages('subject')
+        subjects = db.session.query(Subject.id, Subject.name).filter(Subject.id.in_(list(scores))).order_by(Subject.id).all()
+        return {
+            'labels': [subject.name for subject in subjects],
+            'data': [scores[subject.id] for subject in subjects]
+        }
+
+    return cached_json((CONTENT, RESULTS), build)
+
+
+@stats_bp.route('/chapter-performance')
+def chapter_performance():
+    def build():
+        scores = averages('chapter')
+        chapters = db.session.query(Chapter.id, Chapter.title).filter(Chapter.id.in_(list(scores))).order_by(Chapter.id).all()
+        return {
+            'labels': [chapter.title for chapter in chapters],
+            'datasets': [{
+                'label': 'Average Score',
+                'data': [scores[chapter.id] for chapter in chapters]
+            }]
+        }
+
+    return cached_json((CONTENT, RESULTS), build)
+
+
+@stats_bp.route('/quiz-performance')
+def quiz_performance():
+    def build():
+        scores = averages('quiz')
+        quizzes = db.session.query(Quiz.id, Quiz.title).filter(Quiz.id.in_(list(scores))).order_by(Quiz.id).all()
+        return {
+            'labels': [quiz.title for quiz in quizzes],
+            'data': [scores[quiz.id] for quiz in quizzes]
+        }
+
+    return cached_json((CONTENT, RESULTS), build)
+
+
+@stats_bp.route('/quizzes-per-subject')
+def quizzes_per_subject():
+    def build():
+        subjects = get_content_tree()
+        return {
+            'labels': [subject['name'] for subject in subjects],
+            'data': [sum(len(chapter['quizzes']) for chapter in subject['chapters']) for subject in subjects]
+        }
+
+    return cached_json((CONTENT,), build)
+
+
+@stats_bp.route('/user-averages')
+def user_averages():
+    def build():
+        users = db.session.query(
+            User.full_name,
+            UserPerformance.average_score
+        ).join(
+            UserPerformance, UserPerformance.user_id == User.id
+        ).filter(
+            User.role == 'student'
+        ).order_by(
+            User.id
+        ).all()
+        return {
+            'labels': [user.full_name for user in users],
+            'data': [round(user.average_score, 2) for user in users]
+        }
+
+    return cached_json((RESULTS,), build)
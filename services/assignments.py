@@ -0,0 +1,77 @@
+import time
+from datetime import datetime
+from sqlalchemy.dialects.sqlite import insert
+from models import db, User, Quiz, UserQuizzes
+
+
+class AssignmentBudgetExceeded(Exception):
+    """Raised when a bulk assignment runs past its time budget; nothing is committed."""
+
+
+def _unique_ids(values):
+    ids = []
+    seen = set()
+    for value in values or []:
+        value = int(value)
+        if value not in seen:
+            seen.add(value)
+            ids.append(value)
+    return ids
+
+
+def assign_quizzes(user_ids, quiz_ids, batch_size=500, time_budget=10.0):
+    """Assign every quiz in ``quiz_ids`` to every user in ``user_ids``.
+
+    Users and quizzes are validated with one query each, then the valid pairs
+    are inserted in batches with duplicates ignored by the unique
+    (user_id, quiz_id) index. Everything runs in the caller's transaction;
+    the caller commits. Returns one result dict per requested pair, with a
+    status of 'assigned', 'already_assigned', 'user_not_found',
+    'not_a_student' or 'quiz_not_found'.
+    """
+    started = time.monotonic()
+    user_ids = _unique_ids(user_ids)
+    quiz_ids = _unique_ids(quiz_ids)
+
+    roles = dict(db.session.query(User.id, User.role).filter(User.id.in_(user_ids)).all())
+    known_quizzes = {row.id for row in db.session.query(Quiz.id).filter(Quiz.id.in_(quiz_ids))}
+
+    statuses = {}
+    pending = []
+    for user_id in user_ids:
+        role = roles.get(user_id)
+        for quiz_id in quiz_ids:
+            if role is None:
+                statuses[(user_id, quiz_id)] = 'user_not_found'
+            elif role != 'student':
+                statuses[(user_id, quiz_id)] = 'not_a_student'
+            elif quiz_id not in known_quizzes:
+                statuses[(user_id, quiz_id)] = 'quiz_not_found'
+            else:
+                statuses[(user_id, quiz_id)] = 'already_assigned'
+                pending.append((user_id, quiz_id))
+
+    table = UserQuizzes.__table__
+    assigned_at = datetime.now()
+    for start in range(0, len(pending), batch_size):
+        rows = [{
+            'user_id': user_id,
+            'quiz_id': quiz_id,
+            'assigned_at': assigned_at,
+            'completed': False
+        } for user_id, quiz_id in pending[start:start + batch_size]]
+        stmt = insert(table).values(rows).on_conflict_do_nothing(
+            index_elements=[table.c.user_id, table.c.quiz_id]
+        ).returning(table.c.user_id, table.c.quiz_id)
+        for user_id, quiz_id in db.session.execute(stmt):
+            statuses[(user_id, quiz_id)] = 'assigned'
+        if time.monotonic() - started > time_budget:
+            raise AssignmentBudgetExceeded(
+                f"Bulk assignment exceeded its {time_budget}s budget after {start + len(rows)} of {len(pending)} pairs"
+            )
+
+    return [{
+        'user_id': user_id,
+        'quiz_id': quiz_id,
+        'status': status
+    } for (user_id, quiz_id), status in statuses.items()]
@@ -0,0 +1,132 @@
+import json
+import struct
+from models import db, Question, UserQuizzes
+
+# Compact attempt encoding: question ids as little-endian uint32, selected
+# options and the answer key at grading time as one byte per question.
+# Titles and options are not copied; they are read back from Question.
+NO_ANSWER = 255
+
+
+def pack_ids(ids):
+    return struct.pack(f'<{len(ids)}I', *ids)
+
+
+def unpack_ids(blob):
+    return list(struct.unpack(f'<{len(blob) // 4}I', blob)) if blob else []
+
+
+def pack_choices(choices):
+    return bytes(choice if 0 <= choice < NO_ANSWER else NO_ANSWER for choice in choices)
+
+
+def encode_attempt(question_ids, selected, answer_key, content_version):
+    """Return the UserQuizzes column values for one graded attempt."""
+    correct_count = sum(1 for chosen, correct in zip(selected, answer_key) if chosen == correct)
+    return {
+        'content_version': content_version,
+        'question_ids': pack_ids(question_ids),
+        'selected_answers': pack_choices(selected),
+        'answer_key': pack_choices(answer_key),
+        'correct_count': correct_count,
+        'total_questions': len(question_ids),
+        'answers': None,
+        'accuracy_data': None
+    }
+
+
+def legacy_to_compact(answers, accuracy_data):
+    """Convert the old per-attempt answers/accuracy_data JSON into compact column values."""
+    if isinstance(answers, str):
+        answers = json.loads(answers)
+    if isinstance(accuracy_data, str):
+        accuracy_data = json.loads(accuracy_data)
+    answers = answers or {}
+
+    ordered = [str(result['question_id']) for result in (accuracy_data or {}).get('question_results', [])]
+    ordered = [question_id for question_id in ordered if question_id in answers] or list(answers)
+    return encode_attempt(
+        [int(question_id) for question_id in ordered],
+        [answers[question_id]['selected_answer'] for question_id in ordered],
+        [answers[question_id]['correct_answer'] for question_id in ordered],
+        content_version=None
+    )
+
+
+def attempt_view(user_quiz, questions=None):
+    """Rebuild the answers and accuracy_data dicts for one attempt.
+
+    Question text and options are read from the current Question rows; a
+    question deleted since the attempt is shown without its text. Callers
+    rebuilding many attempts pass ``questions``, a {question id: row} map
+    loaded once, instead of a query per attempt.
+    """
+    if user_quiz.question_ids is None:
+        # Attempt stored before the compact encoding
+        return user_quiz.answers or {}, user_quiz.accuracy_data or {}
+
+    question_ids = unpack_ids(user_quiz.question_ids)
+    selected = list(user_quiz.selected_answers)
+    answer_key = list(user_quiz.answer_key)
+    if questions is None:
+        questions = {
+            question.id: question for question in db.session.query(
+                Question.id, Question.title, Question.options
+            ).filter(Question.id.in_(question_ids))
+        }
+
+    answers = {}
+    question_results = []
+    for question_id, chosen, correct in zip(question_ids, selected, answer_key):
+        question = questions.get(question_id)
+        is_correct = chosen == correct
+        answers[str(question_id)] = {
+            'selected_answer': None if chosen == NO_ANSWER else chosen,
+            'correct_answer': correct,
+            'is_correct': is_correct,
+            'question_title': question.title if question else '(question deleted)',
+            'options': question.options if question else []
+        }
+        question_results.append({'question_id': question_id, 'is_correct': is_correct})
+
+    total = len(question_ids)
+    accuracy_data = {
+        'total_questions': total,
+        'correct_answers': user_quiz.correct_count,
+        'score_percentage': user_quiz.score,
+        'question_results': question_results
+    }
+    return answers, accuracy_data
+
+
+def storage_report(limit=10000):
+    """Compare the compact encoding with the legacy JSON for up to ``limit`` attempts.
+
+    Returns a dict with the attempt count and the byte totals of both
+    encodings, the legacy size being rebuilt from the same attempts.
+    """
+    attempts = UserQuizzes.query.filter(
+        UserQuizzes.completed == True,
+        UserQuizzes.question_ids.isnot(None)
+    ).order_by(UserQuizzes.id.desc()).limit(limit).all()
+    # Every question the attempts refer to, loaded in one query through their quizzes
+    questions = {
+        question.id: question for question in db.session.query(
+            Question.id, Question.title, Question.options
+        ).filter(Question.quiz_id.in_({attempt.quiz_id for attempt in attempts}))
+    }
+
+    compact_bytes = 0
+    legacy_bytes = 0
+    for attempt in attempts:
+        # Two integer columns (correct_count, total_questions) ride along with the blobs
+        compact_bytes += len(attempt.question_ids) + len(attempt.selected_answers) + len(attempt.answer_key) + 8
+        answers, accuracy_data = attempt_view(attempt, questions)
+        legacy_bytes += len(json.dumps(answers)) + len(json.dumps(accuracy_data))
+
+    return {
+        'attempts': len(attempts),
+        'compact_bytes': compact_bytes,
+        'legacy_bytes': legacy_bytes,
+        'reduction': 1 - compact_bytes / legacy_bytes if legacy_bytes else 0.0
+    }
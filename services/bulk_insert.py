@@ -0,0 +1,17 @@
+from sqlalchemy import text
+from models import db
+
+
+def insert_rows(model, rows):
+    """Insert ``rows`` with one executemany and return their new ids, in order.
+
+    INSERT ... RETURNING has no sentinel column to sort by on SQLite, so
+    SQLAlchemy would fall back to one statement per row. The transaction
+    holds the write lock for the whole executemany, so the rows get
+    contiguous rowids ending at last_insert_rowid(). The caller commits.
+    """
+    if not rows:
+        return []
+    db.session.execute(db.insert(model), rows)
+    last_id = db.session.execute(text('SELECT last_insert_rowid()')).scalar()
+    return list(range(last_id - len(rows) + 1, last_id + 1))
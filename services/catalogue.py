@@ -0,0 +1,109 @@
+from datetime import datetime
+from models import db, Subject, Chapter, Quiz, UserQuizzes
+
+# Sort name -> (column, newest/largest first); ties are broken by the assignment id
+CATALOGUE_SORTS = {
+    'assigned': (UserQuizzes.assigned_at, True),
+    'title': (Quiz.title, False),
+    'duration': (Quiz.duration, False),
+}
+CATALOGUE_STATUSES = ('pending', 'completed')
+
+
+def encode_cursor(sort, value, user_quiz_id):
+    if sort == 'assigned':
+        value = value.isoformat()
+    return f"{value}_{user_quiz_id}"
+
+
+def decode_cursor(sort, cursor):
+    """Return (sort value, assignment id) from a cursor string, or raise ValueError."""
+    value, separator, user_quiz_id = cursor.rpartition('_')
+    if not separator:
+        raise ValueError("Malformed cursor")
+    if sort == 'assigned':
+        value = datetime.fromisoformat(value)
+    elif sort == 'duration':
+        value = int(value)
+    return value, int(user_quiz_id)
+
+
+def catalogue_page(user_id, subject_id=None, chapter_id=None, status=None, sort='assigned', cursor=None, limit=20):
+    """Return one page of a student's assigned quizzes and the cursor of the next page.
+
+    Filtering, ordering and keyset pagination on (sort column, assignment id)
+    all happen in one joined query, so a page costs the same however many
+    quizzes the student has been assigned. ``status`` is 'pending',
+    'completed' or None for both. Raises ValueError for an unknown sort or
+    status or a malformed cursor.
+    """
+    if sort not in CATALOGUE_SORTS:
+        raise ValueError(f"Unknown sort {sort}")
+    if status is not None and status not in CATALOGUE_STATUSES:
+        raise ValueError(f"Unknown status {status}")
+    sort_column, descending = CATALOGUE_SORTS[sort]
+
+    query = db.session.query(
+        UserQuizzes.id.label('user_quiz_id'),
+        UserQuizzes.assigned_at,
+        UserQuizzes.completed,
+        UserQuizzes.completed_at,
+        UserQuizzes.score,
+        Quiz.id,
+        Quiz.title,
+        Quiz.duration,
+        Quiz.question_count,
+        Subject.id.label('subject_id'),
+        Subject.name.label('subject_name'),
+        Chapter.id.label('chapter_id'),
+        Chapter.title.label('chapter_name')
+    ).join(
+        Quiz, UserQuizzes.quiz_id == Quiz.id
+    ).join(
+        Chapter, Quiz.chapter_id == Chapter.id
+    ).join(
+        Subject, Quiz.subject_id == Subject.id
+    ).filter(
+        UserQuizzes.user_id == user_id,
+        Quiz.question_count > 0
+    )
+
+    if subject_id:
+        query = query.filter(Quiz.subject_id == subject_id)
+    if chapter_id:
+        query = query.filter(Quiz.chapter_id == chapter_id)
+    if status == 'completed':
+        query = query.filter(UserQuizzes.completed == True)
+    elif status == 'pending':
+        query = query.filter(db.or_(UserQuizzes.completed == False, UserQuizzes.completed.is_(None)))
+    if cursor:
+        key = db.tuple_(sort_column, UserQuizzes.id)
+        after = db.tuple_(*decode_cursor(sort, cursor))
+        query = query.filter(key < after if descending else key > after)
+
+    if descending:
+        query = query.order_by(sort_column.desc(), UserQuizzes.id.desc())
+    else:
+        query = query.order_by(sort_column, UserQuizzes.id)
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort, getattr(last, sort_column.key), last.user_quiz_id)
+
+    return [{
+        'id': row.id,
+        'title': row.title,
+        'subject_id': row.subject_id,
+        'subject_name': row.subject_name,
+        'chapter_id': row.chapter_id,
+        'chapter_name': row.chapter_name,
+        'duration': row.duration,
+        'question_count': row.question_count,
+        'assigned_at': row.assigned_at,
+        'completed': bool(row.completed),
+        'completed_at': row.completed_at,
+        'score': row.score
+    } for row in rows], next_cursor
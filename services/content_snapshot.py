@@ -0,0 +1,179 @@
+import gzip
+import json
+from datetime import datetime
+from models import db, Subject, Chapter, Quiz, Question
+from services.bulk_insert import insert_rows
+from services.question_import import parse_question
+from services.question_search import (suspend_search_index, create_search_index, rebuild_search_index,
+                                      rebuild_question_bands)
+from services.versions import bump_version
+
+# Gzipped JSONL: a header line, then one record per line in dependency order
+# (subjects, chapters, quizzes, questions). Records keep their source ids;
+# foreign keys refer to those ids and are remapped on import.
+SNAPSHOT_FORMAT = 'quizzer-content'
+SNAPSHOT_VERSION = 1
+
+_FIELDS = {
+    'subject': (Subject, ('id', 'name', 'description')),
+    'chapter': (Chapter, ('id', 'subject_id', 'title', 'description', 'order')),
+    'quiz': (Quiz, ('id', 'subject_id', 'chapter_id', 'title', 'description', 'duration')),
+    'question': (Question, ('id', 'quiz_id', 'title', 'options', 'correct_answer')),
+}
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _iter_rows(model, columns, chunk_size):
+    query = db.session.query(*[getattr(model, column) for column in columns]).order_by(model.id)
+    last_id = 0
+    while True:
+        rows = query.filter(model.id > last_id).limit(chunk_size).all()
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1].id
+
+
+def export_content(path, chunk_size=5000):
+    """Write the whole subject/chapter/quiz/question hierarchy to a snapshot file.
+
+    Returns the number of records written per type.
+    """
+    counts = {kind: db.session.query(model).count() for kind, (model, _) in _FIELDS.items()}
+    with gzip.open(path, 'wt', encoding='utf-8') as out:
+        out.write(json.dumps({'format': SNAPSHOT_FORMAT, 'version': SNAPSHOT_VERSION,
+                              'created_at': datetime.utcnow().isoformat(), 'counts': counts}) + '\n')
+        for kind, (model, columns) in _FIELDS.items():
+            for row in _iter_rows(model, columns, chunk_size):
+                out.write(json.dumps(dict(zip(columns, row), type=kind)) + '\n')
+    return counts
+
+
+def _check_record(kind, record, line_no):
+    # Reject records the insert would fail on, naming the line; optional fields default to null
+    model, columns = _FIELDS[kind]
+    unknown = sorted(set(record) - set(columns))
+    if unknown:
+        raise SnapshotError(f"Line {line_no}: unknown {kind} field {', '.join(unknown)}")
+    for column in columns:
+        if record.get(column) is not None:
+            continue
+        if not model.__table__.c[column].nullable:
+            raise SnapshotError(f"Line {line_no}: {kind} is missing {column}")
+        record[column] = None
+    if kind == 'question':
+        try:
+            parse_question(record)
+        except ValueError as e:
+            raise SnapshotError(f"Line {line_no}: {e}")
+
+
+def import_content(path, batch_size=5000):
+    """Load a snapshot into the database as new rows, in one transaction.
+
+    Rows are bulk inserted a batch at a time and every foreign key is
+    resolved through an in-memory map from snapshot ids to new ids. The
+    full-text index and LSH buckets of the new questions are built in one
+    pass after the load rather than row by row.
+    Question counts are set from the snapshot. Nothing is committed if the
+    snapshot is invalid. Returns (counts, remap) where remap is
+    {type: {snapshot id: new id}}.
+    """
+    remap = {kind: {} for kind in _FIELDS}
+    question_counts = {}
+    pending = {kind: [] for kind in _FIELDS}
+    # Snapshot chapter id -> snapshot subject id
+    chapter_subjects = {}
+    # Highest question id before the load, set once questions start
+    indexed_up_to = None
+
+    def resolve(kind, snapshot_id, line_no):
+        try:
+            return remap[kind][snapshot_id]
+        except KeyError:
+            raise SnapshotError(f"Line {line_no}: unknown {kind} id {snapshot_id}")
+
+    def flush(kind):
+        nonlocal indexed_up_to
+        rows = pending[kind]
+        if not rows:
+            return
+        model, _ = _FIELDS[kind]
+        if kind == 'question' and indexed_up_to is None:
+            indexed_up_to = db.session.query(db.func.max(Question.id)).scalar() or 0
+            suspend_search_index(db.session.connection())
+        new_ids = insert_rows(model, [row for _, row in rows])
+        for (snapshot_id, _), new_id in zip(rows, new_ids):
+            remap[kind][snapshot_id] = new_id
+        pending[kind] = []
+
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as source:
+            header = json.loads(source.readline() or '{}')
+            if header.get('format') != SNAPSHOT_FORMAT:
+                raise SnapshotError("Not a content snapshot")
+            if header.get('version') != SNAPSHOT_VERSION:
+                raise SnapshotError(f"Unsupported snapshot version {header.get('version')}")
+
+            current = None
+            for line_no, line in enumerate(source, start=2):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise SnapshotError(f"Line {line_no}: record must be an object")
+                kind = record.pop('type', None)
+                if kind not in _FIELDS:
+                    raise SnapshotError(f"Line {line_no}: unknown record type {kind}")
+                _check_record(kind, record, line_no)
+                if kind != current:
+                    # Parents must be inserted before their children are resolved
+                    if current is not None:
+                        flush(current)
+                    current = kind
+
+                snapshot_id = record.pop('id')
+                if kind == 'chapter':
+                    chapter_subjects[snapshot_id] = record['subject_id']
+                    record['subject_id'] = resolve('subject', record['subject_id'], line_no)
+                elif kind == 'quiz':
+                    if chapter_subjects.get(record['chapter_id']) != record['subject_id']:
+                        raise SnapshotError(f"Line {line_no}: quiz subject does not match its chapter's subject")
+                    record['subject_id'] = resolve('subject', record['subject_id'], line_no)
+                    record['chapter_id'] = resolve('chapter', record['chapter_id'], line_no)
+                    record['question_count'] = 0
+                elif kind == 'question':
+                    record['quiz_id'] = resolve('quiz', record['quiz_id'], line_no)
+                    question_counts[record['quiz_id']] = question_counts.get(record['quiz_id'], 0) + 1
+                pending[kind].append((snapshot_id, record))
+                if len(pending[kind]) >= batch_size:
+                    flush(kind)
+            if current is not None:
+                flush(current)
+    except (OSError, ValueError, KeyError) as e:
+        db.session.rollback()
+        raise SnapshotError(f"Unreadable snapshot: {e}")
+    except Exception:
+        db.session.rollback()
+        raise
+
+    if indexed_up_to is not None:
+        conn = db.session.connection()
+        rebuild_search_index(conn, after_id=indexed_up_to)
+        create_search_index(conn)
+        rebuild_question_bands(after_id=indexed_up_to)
+
+    if question_counts:
+        table = Quiz.__table__
+        db.session.execute(
+            table.update().where(table.c.id == db.bindparam('new_quiz_id')).values(
+                question_count=db.bindparam('new_question_count')
+            ),
+            [{'new_quiz_id': quiz_id, 'new_question_count': count} for quiz_id, count in question_counts.items()]
+        )
+    bump_version()
+    db.session.commit()
+    return {kind: len(ids) for kind, ids in remap.items()}, remap
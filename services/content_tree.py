@@ -0,0 +1,69 @@
+import threading
+from models import db, Subject, Chapter, Quiz
+from services.versions import CONTENT, get_version
+
+_lock = threading.Lock()
+_cache = {'entry': None}  # (version, tree, chapters_by_subject)
+
+
+def _build_tree():
+    """Build the subject -> chapter -> quiz hierarchy in three queries."""
+    subjects = db.session.query(Subject.id, Subject.name).order_by(Subject.id).all()
+    chapters = db.session.query(
+        Chapter.id, Chapter.subject_id, Chapter.title, Chapter.description, Chapter.order
+    ).order_by(Chapter.subject_id, Chapter.order, Chapter.id).all()
+    quizzes = db.session.query(
+        Quiz.id, Quiz.chapter_id, Quiz.title, Quiz.description, Quiz.duration
+    ).order_by(Quiz.id).all()
+
+    quizzes_by_chapter = {}
+    for quiz in quizzes:
+        quizzes_by_chapter.setdefault(quiz.chapter_id, []).append({
+            'id': quiz.id,
+            'title': quiz.title,
+            'description': quiz.description,
+            'duration': quiz.duration
+        })
+
+    chapters_by_subject = {}
+    for chapter in chapters:
+        chapters_by_subject.setdefault(chapter.subject_id, []).append({
+            'id': chapter.id,
+            'title': chapter.title,
+            'description': chapter.description,
+            'order': chapter.order,
+            'quizzes': quizzes_by_chapter.get(chapter.id, [])
+        })
+
+    tree = [{
+        'id': subject.id,
+        'name': subject.name,
+        'chapters': chapters_by_subject.get(subject.id, [])
+    } for subject in subjects]
+    return tree, chapters_by_subject
+
+
+def _current():
+    # Read the version before the rows: a write that lands in between is
+    # cached under the old number and rebuilt on the next call
+    version = get_version(CONTENT)
+    entry = _cache['entry']
+    if entry is not None and entry[0] == version:
+        return entry
+    with _lock:
+        entry = _cache['entry']
+        if entry is None or entry[0] != version:
+            tree, by_subject = _build_tree()
+            entry = (version, tree, by_subject)
+            _cache['entry'] = entry
+        return entry
+
+
+def get_content_tree():
+    """Return the cached subject/chapter/quiz hierarchy (treat as read-only)."""
+    return _current()[1]
+
+
+def get_subject_chapters(subject_id):
+    """Return the ordered chapters of one subject from the cached tree."""
+    return _current()[2].get(subject_id, [])
@@ -0,0 +1,46 @@
+from sqlalchemy import event
+
+JOURNAL_MODES = ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF')
+SYNCHRONOUS_LEVELS = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+
+def configure_sqlite(engine, journal_mode='WAL', synchronous='NORMAL', busy_timeout_ms=5000):
+    """Apply the SQLite connection profile to every new connection of ``engine``.
+
+    WAL lets readers run alongside the single writer, synchronous=NORMAL
+    syncs at checkpoints instead of on every commit, and the busy timeout
+    makes a writer wait for the lock instead of failing with "database is
+    locked". Engines for other databases are left alone.
+    """
+    if engine.dialect.name != 'sqlite':
+        return False
+
+    journal_mode = journal_mode.upper()
+    synchronous = synchronous.upper()
+    if journal_mode not in JOURNAL_MODES:
+        raise ValueError(f"Unknown SQLite journal mode: {journal_mode}")
+    if synchronous not in SYNCHRONOUS_LEVELS:
+        raise ValueError(f"Unknown SQLite synchronous level: {synchronous}")
+    busy_timeout_ms = int(busy_timeout_ms)
+
+    @event.listens_for(engine, 'connect')
+    def _apply_profile(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            # busy_timeout first so switching the journal mode can wait for the lock too
+            cursor.execute(f'PRAGMA busy_timeout = {busy_timeout_ms}')
+            cursor.execute(f'PRAGMA journal_mode = {journal_mode}')
+            cursor.execute(f'PRAGMA synchronous = {synchronous}')
+        finally:
+            cursor.close()
+
+    return True
+
+
+def sqlite_settings(connection):
+    """Return the effective journal mode, synchronous level and busy timeout of a connection."""
+    return {
+        'journal_mode': connection.exec_driver_sql('PRAGMA journal_mode').scalar(),
+        'synchronous': SYNCHRONOUS_LEVELS[connection.exec_driver_sql('PRAGMA synchronous').scalar()],
+        'busy_timeout_ms': connection.exec_driver_sql('PRAGMA busy_timeout').scalar()
+    }
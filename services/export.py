@@ -0,0 +1,154 @@
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta
+from models import db, User, Subject, Chapter, Quiz, UserQuizzes
+from services.attempts import NO_ANSWER, unpack_ids
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+CSV_COLUMNS = ['attempt_id', 'student_id', 'student_name', 'username', 'quiz_id', 'quiz_title', 'subject',
+               'chapter', 'completed_at', 'score', 'correct_answers', 'total_questions', 'question_results']
+# Output is sent in pieces of roughly this many characters
+CHUNK_CHARS = 16384
+
+
+def parse_date_range(date_from=None, date_to=None):
+    """Turn inclusive 'YYYY-MM-DD' bounds into (since, until) datetimes; raises ValueError."""
+    since = datetime.combine(date.fromisoformat(date_from), datetime.min.time()) if date_from else None
+    until = datetime.combine(date.fromisoformat(date_to) + timedelta(days=1), datetime.min.time()) if date_to else None
+    return since, until
+
+
+def _question_results(row):
+    if row.question_ids is None:
+        # Attempt stored before the compact encoding
+        return [{'question_id': int(result['question_id']), 'selected_answer': None, 'correct_answer': None,
+                 'is_correct': bool(result['is_correct'])}
+                for result in (row.accuracy_data or {}).get('question_results', [])]
+    return [{'question_id': question_id, 'selected_answer': None if chosen == NO_ANSWER else chosen,
+             'correct_answer': correct, 'is_correct': chosen == correct}
+            for question_id, chosen, correct in zip(unpack_ids(row.question_ids), row.selected_answers, row.answer_key)]
+
+
+def iter_attempts(subject_id=None, since=None, until=None, chunk_size=1000):
+    """Yield completed attempts as dicts, oldest first, ``chunk_size`` rows per query.
+
+    Keyset pagination on (completed_at, id) over the completed_at index:
+    each chunk is a fresh short query, so memory stays flat and no read
+    transaction is held open between chunks. ``since`` is inclusive and
+    ``until`` exclusive.
+    """
+    query = db.session.query(
+        UserQuizzes.id,
+        UserQuizzes.completed_at,
+        UserQuizzes.score,
+        UserQuizzes.correct_count,
+        UserQuizzes.total_questions,
+        UserQuizzes.question_ids,
+        UserQuizzes.selected_answers,
+        UserQuizzes.answer_key,
+        UserQuizzes.accuracy_data,
+        User.id.label('student_id'),
+        User.full_name.label('student_name'),
+        User.username,
+        Quiz.id.label('quiz_id'),
+        Quiz.title.label('quiz_title'),
+        Subject.name.label('subject_name'),
+        Chapter.title.label('chapter_title')
+    ).join(
+        User, UserQuizzes.user_id == User.id
+    ).join(
+        Quiz, UserQuizzes.quiz_id == Quiz.id
+    ).outerjoin(
+        Subject, Quiz.subject_id == Subject.id
+    ).outerjoin(
+        Chapter, Quiz.chapter_id == Chapter.id
+    ).filter(
+        UserQuizzes.completed == True,
+        UserQuizzes.completed_at.isnot(None)
+    )
+    if subject_id:
+        query = query.filter(Quiz.subject_id == subject_id)
+    if since:
+        query = query.filter(UserQuizzes.completed_at >= since)
+    if until:
+        query = query.filter(UserQuizzes.completed_at < until)
+
+    last = None
+    while True:
+        chunk = query
+        if last is not None:
+            chunk = chunk.filter(db.tuple_(UserQuizzes.completed_at, UserQuizzes.id) > db.tuple_(*last))
+        rows = chunk.order_by(UserQuizzes.completed_at, UserQuizzes.id).limit(chunk_size).all()
+        # End the read so writers are not held behind a long export
+        db.session.rollback()
+        if not rows:
+            return
+        for row in rows:
+            results = _question_results(row)
+            yield {
+                'attempt_id': row.id,
+                'student_id': row.student_id,
+                'student_name': row.student_name,
+                'username': row.username,
+                'quiz_id': row.quiz_id,
+                'quiz_title': row.quiz_title,
+                'subject': row.subject_name,
+                'chapter': row.chapter_title,
+                'completed_at': row.completed_at.isoformat(),
+                'score': row.score,
+                'correct_answers': row.correct_count if row.correct_count is not None
+                else sum(1 for result in results if result['is_correct']),
+                'total_questions': row.total_questions if row.total_questions is not None else len(results),
+                'question_results': results
+            }
+        last = (rows[-1].completed_at, rows[-1].id)
+
+
+def to_csv(attempts):
+    """Yield CSV lines, a header and then one line per attempt.
+
+    Per-question correctness is packed in one cell as 'question_id:1|question_id:0'.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for values in _csv_values(attempts):
+        writer.writerow(values)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _csv_values(attempts):
+    yield CSV_COLUMNS
+    for attempt in attempts:
+        attempt = dict(attempt, question_results='|'.join(
+            f"{result['question_id']}:{int(result['is_correct'])}" for result in attempt['question_results']
+        ))
+        yield [attempt[column] for column in CSV_COLUMNS]
+
+
+def to_jsonl(attempts):
+    """Yield one JSON object per line per attempt."""
+    for attempt in attempts:
+        yield json.dumps(attempt) + '\n'
+
+
+def _in_chunks(lines):
+    pending = []
+    size = 0
+    for line in lines:
+        pending.append(line)
+        size += len(line)
+        if size >= CHUNK_CHARS:
+            yield ''.join(pending)
+            pending = []
+            size = 0
+    if pending:
+        yield ''.join(pending)
+
+
+def export_results(fmt, **filters):
+    """Return a generator of text chunks for the requested format."""
+    attempts = iter_attempts(**filters)
+    return _in_chunks(to_csv(attempts) if fmt == 'csv' else to_jsonl(attempts))
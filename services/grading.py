@@ -0,0 +1,122 @@
+from collections import defaultdict
+from models import db, Question, UserQuizzes, PerformanceAggregate
+from services.attempts import pack_choices, unpack_ids
+from services.performance import rebuild_user_performance
+from services.question_stats import forget_questions, record_many_question_results
+from services.versions import get_version, quiz_version_name
+
+try:
+    import numpy as np
+except ImportError:  # Grading falls back to plain Python loops
+    np = None
+
+
+def grade_batch(selected_rows, answer_key):
+    """Grade many attempts of the same question layout in one operation.
+
+    ``selected_rows`` holds one bytes object per attempt (one selected option
+    index per question) and ``answer_key`` the correct index per question.
+    Returns the number of correct answers for each attempt.
+    """
+    if not selected_rows:
+        return []
+    if np is not None:
+        matrix = np.frombuffer(b''.join(selected_rows), dtype=np.uint8).reshape(len(selected_rows), len(answer_key))
+        key = np.frombuffer(bytes(answer_key), dtype=np.uint8)
+        return (matrix == key).sum(axis=1).tolist()
+    return [sum(1 for chosen, correct in zip(row, answer_key) if chosen == correct) for row in selected_rows]
+
+
+def _current_key(question_ids, stored_key, current_answers):
+    # Questions deleted since the attempt keep the key they were graded with
+    return pack_choices([
+        current_answers.get(question_id, stored_key[position])
+        for position, question_id in enumerate(question_ids)
+    ])
+
+
+def regrade_quiz(quiz, chunk_size=5000):
+    """Rescore every completed attempt of ``quiz`` against the current answer key.
+
+    Attempts are read in id order, ``chunk_size`` at a time. Attempts with the
+    same question layout are graded together as one matrix, and changed rows
+    are written back with one executemany UPDATE per chunk, stamped with the
+    quiz's current content version since they now match it. The quiz's totals,
+    the affected students' rollups and the question statistics are refreshed
+    in the same transaction. The caller commits. Returns (attempts, changed).
+    """
+    current_answers = dict(db.session.query(Question.id, Question.correct_answer).filter(Question.quiz_id == quiz.id))
+    forget_questions(list(current_answers))
+
+    table = UserQuizzes.__table__
+    update = table.update().where(table.c.id == db.bindparam('attempt_id')).values(
+        score=db.bindparam('new_score'),
+        correct_count=db.bindparam('new_correct_count'),
+        answer_key=db.bindparam('new_answer_key'),
+        content_version=get_version(quiz_version_name(quiz.id))
+    )
+
+    attempts = 0
+    changed = 0
+    changed_users = set()
+    score_delta = 0.0
+    last_id = 0
+    while True:
+        rows = db.session.query(
+            UserQuizzes.id, UserQuizzes.user_id, UserQuizzes.score, UserQuizzes.question_ids,
+            UserQuizzes.selected_answers, UserQuizzes.answer_key
+        ).filter(
+            UserQuizzes.quiz_id == quiz.id,
+            UserQuizzes.completed == True,
+            UserQuizzes.question_ids.isnot(None),
+            UserQuizzes.id > last_id
+        ).order_by(UserQuizzes.id).limit(chunk_size).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        attempts += len(rows)
+
+        # Group by (layout, key at grading time) so each group shares one key vector
+        groups = defaultdict(list)
+        for row in rows:
+            groups[(row.question_ids, row.answer_key)].append(row)
+
+        updates = []
+        graded = []
+        for (layout, stored_key), group in groups.items():
+            question_ids = unpack_ids(layout)
+            key = _current_key(question_ids, stored_key, current_answers)
+            counts = grade_batch([row.selected_answers for row in group], key)
+            # Only questions that still exist get statistics
+            live = [position for position, question_id in enumerate(question_ids) if question_id in current_answers]
+            live_ids = [question_ids[position] for position in live]
+            live_key = bytes(key[position] for position in live)
+            for row, correct_count in zip(group, counts):
+                score = (correct_count / len(question_ids)) * 100
+                live_selected = bytes(row.selected_answers[position] for position in live)
+                graded.append((live_ids, live_selected, live_key, score))
+                if key != stored_key or score != row.score:
+                    updates.append({
+                        'attempt_id': row.id,
+                        'new_score': score,
+                        'new_correct_count': correct_count,
+                        'new_answer_key': key
+                    })
+                    changed_users.add(row.user_id)
+                    score_delta += score - (row.score or 0)
+        record_many_question_results(graded)
+        if updates:
+            db.session.execute(update, updates)
+            changed += len(updates)
+
+    if score_delta:
+        aggregates = PerformanceAggregate.__table__
+        for scope, entity_id in (('subject', quiz.subject_id), ('chapter', quiz.chapter_id), ('quiz', quiz.id)):
+            db.session.execute(
+                aggregates.update().where(
+                    aggregates.c.scope == scope, aggregates.c.entity_id == entity_id
+                ).values(score_sum=aggregates.c.score_sum + score_delta)
+            )
+    if changed_users:
+        rebuild_user_performance(changed_users)
+    return attempts, changed
@@ -0,0 +1,169 @@
+import threading
+import time
+from flask import g, request
+from sqlalchemy import event
+
+# Request latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_HELP = {
+    'quizzer_http_requests_total': ('counter', 'Requests handled, by endpoint, method and status'),
+    'quizzer_http_request_errors_total': ('counter', 'Requests that ended in a 5xx response, by endpoint'),
+    'quizzer_http_request_duration_seconds': ('histogram', 'Request latency, by endpoint'),
+    'quizzer_quiz_submissions_total': ('counter', 'Quiz submissions, by outcome'),
+    'quizzer_db_connections_opened_total': ('counter', 'DBAPI connections opened by the engine'),
+}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _new_shard():
+    return {'counters': {}, 'histograms': {}}
+
+
+def _fold(into, shard):
+    # Add one shard's counters and histograms into another
+    counters = into['counters']
+    histograms = into['histograms']
+    for key, value in dict(shard['counters']).items():
+        counters[key] = counters.get(key, 0) + value
+    for key, (buckets, total, count) in dict(shard['histograms']).items():
+        merged = histograms.setdefault(key, [[0] * len(LATENCY_BUCKETS), 0.0, 0])
+        merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+        merged[1] += total
+        merged[2] += count
+
+
+class Metrics:
+    """Process-wide counters and histograms with one shard per thread.
+
+    A thread only ever writes its own shard, so recording takes no lock;
+    the exposition merges all shards when /metrics is scraped. Shards of
+    threads that have exited are folded into one retired total, so servers
+    that spawn a thread per request keep a bounded number of shards.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._retired = _new_shard()
+        self._shards_lock = threading.Lock()
+        self._gauges = []
+        self.started_at = time.time()
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = _new_shard()
+            self._local.shard = shard
+            with self._shards_lock:
+                self._retire_dead_shards()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _retire_dead_shards(self):
+        # A thread that has exited no longer writes its shard; called with _shards_lock held
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                _fold(self._retired, shard)
+        self._shards = live
+
+    def inc(self, name, labels=(), amount=1):
+        counters = self._shard()['counters']
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        histograms = self._shard()['histograms']
+        key = (name, labels)
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = [[0] * len(LATENCY_BUCKETS), 0.0, 0]
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                histogram[0][index] += 1
+                break
+        histogram[1] += value
+        histogram[2] += 1
+
+    def gauge(self, name, help_text, collect):
+        """Register a gauge family; ``collect()`` returns [(labels, value)] at scrape time."""
+        self._gauges.append((name, help_text, collect))
+
+    def init_app(self, app, engine):
+        if not app.config['METRICS_ENABLED']:
+            return
+        event.listen(engine, 'connect', lambda *args: self.inc('quizzer_db_connections_opened_total'))
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    def _start_request(self):
+        g.metrics_started = time.perf_counter()
+
+    def _finish_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            endpoint = request.endpoint or 'none'
+            status = response.status_code
+            self.inc('quizzer_http_requests_total', (('endpoint', endpoint), ('method', request.method), ('status', status)))
+            if status >= 500:
+                self.inc('quizzer_http_request_errors_total', (('endpoint', endpoint),))
+            self.observe('quizzer_http_request_duration_seconds', (('endpoint', endpoint),), time.perf_counter() - started)
+        return response
+
+    def _merged(self):
+        merged = _new_shard()
+        with self._shards_lock:
+            self._retire_dead_shards()
+            _fold(merged, self._retired)
+            shards = [shard for _, shard in self._shards]
+        for shard in shards:
+            _fold(merged, shard)
+        return merged['counters'], merged['histograms']
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format (0.0.4)."""
+        counters, histograms = self._merged()
+        lines = []
+        for name, (kind, help_text) in _HELP.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == 'counter':
+                for (metric, labels), value in sorted(counters.items(), key=lambda item: str(item[0])):
+                    if metric == name:
+                        lines.append(f'{name}{_labels(labels)} {value}')
+                continue
+            for (metric, labels), (buckets, total, count) in sorted(histograms.items(), key=lambda item: str(item[0])):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, bucket in zip(LATENCY_BUCKETS, buckets):
+                    cumulative += bucket
+                    lines.append(f'{name}_bucket{_labels(labels + (("le", bound),))} {cumulative}')
+                lines.append(f'{name}_bucket{_labels(labels + (("le", "+Inf"),))} {count}')
+                lines.append(f'{name}_sum{_labels(labels)} {total}')
+                lines.append(f'{name}_count{_labels(labels)} {count}')
+
+        lines.append('# HELP quizzer_process_start_time_seconds Unix time the process started')
+        lines.append('# TYPE quizzer_process_start_time_seconds gauge')
+        lines.append(f'quizzer_process_start_time_seconds {self.started_at}')
+        for name, help_text, collect in self._gauges:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} gauge')
+            for labels, value in collect():
+                lines.append(f'{name}{_labels(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
@@ -0,0 +1,70 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class PasswordHasher:
+    """Password hashing off the request thread.
+
+    Hashes run in a process pool of ``workers`` processes, with at most
+    ``max_pending`` hashes queued or running at once; further callers wait
+    for a slot. ``workers = 0`` hashes inline. ``method`` is any werkzeug
+    method string, e.g. 'scrypt:32768:8:1' or 'pbkdf2:sha256:600000'.
+
+    The pool is started on first use with the 'spawn' method: forking a
+    threaded server would copy locks and open database connections held by
+    other threads into the workers.
+    """
+
+    def __init__(self, method='scrypt:32768:8:1', workers=2, max_pending=64):
+        self.method = method
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pool = None
+        self._slots = None
+        self._prefix = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.shutdown()
+        self.method = app.config['PASSWORD_HASH_METHOD']
+        self.workers = app.config['PASSWORD_HASH_WORKERS']
+        self.max_pending = app.config['PASSWORD_HASH_MAX_PENDING']
+        self._prefix = None
+
+    def _run(self, fn, *args, inline=False):
+        if inline or not self.workers:
+            return fn(*args)
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+                self._slots = threading.BoundedSemaphore(self.max_pending)
+            pool, slots = self._pool, self._slots
+        with slots:
+            return pool.submit(fn, *args).result()
+
+    def hash(self, password, inline=False):
+        """Hash ``password``; ``inline`` hashes on the calling thread, e.g. during startup."""
+        return self._run(generate_password_hash, password, self.method, inline=inline)
+
+    def verify(self, stored_hash, password):
+        return self._run(check_password_hash, stored_hash, password)
+
+    def needs_rehash(self, stored_hash):
+        """True when ``stored_hash`` was made with different parameters than ``method``."""
+        if self._prefix is None:
+            # werkzeug expands defaults ('scrypt' -> 'scrypt:32768:8:1'), so compare against a real hash
+            self._prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return stored_hash.split('$', 1)[0] != self._prefix
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+            self._pool = None
+            self._slots = None
+
+
+password_hasher = PasswordHasher()
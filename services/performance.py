@@ -0,0 +1,190 @@
+from sqlalchemy.dialects.sqlite import insert
+from models import db, Subject, Chapter, Quiz, UserQuizzes, UserPerformance, UserDailyPerformance
+from services.versions import RESULTS, bump_version
+
+
+def record_attempt(user_id, score, completed_at):
+    """Fold one completed attempt into the student's rollup rows.
+
+    Runs as upserts on the caller's session so it commits (or rolls back)
+    together with the UserQuizzes update in submit_quiz.
+    """
+    table = UserPerformance.__table__
+    stmt = insert(table).values(
+        user_id=user_id,
+        attempt_count=1,
+        score_sum=score,
+        average_score=score,
+        best_score=score,
+        last_attempt_at=completed_at
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id],
+        set_={
+            'attempt_count': table.c.attempt_count + 1,
+            'score_sum': table.c.score_sum + score,
+            'average_score': (table.c.score_sum + score) / (table.c.attempt_count + 1),
+            'best_score': db.func.max(db.func.coalesce(table.c.best_score, score), score),
+            'last_attempt_at': completed_at
+        }
+    )
+    db.session.execute(stmt)
+
+    daily = UserDailyPerformance.__table__
+    stmt = insert(daily).values(
+        user_id=user_id,
+        day=completed_at.date(),
+        attempt_count=1,
+        score_sum=score
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[daily.c.user_id, daily.c.day],
+        set_={
+            'attempt_count': daily.c.attempt_count + 1,
+            'score_sum': daily.c.score_sum + score
+        }
+    )
+    db.session.execute(stmt)
+
+
+def rebuild_user_performance(user_ids=None):
+    """Regenerate rollup rows from the completed UserQuizzes rows.
+
+    With ``user_ids`` only those students are recomputed. The caller commits.
+    """
+    table = UserPerformance.__table__
+    completed = db.select(
+        UserQuizzes.user_id,
+        db.func.count(UserQuizzes.id),
+        db.func.sum(UserQuizzes.score),
+        db.func.avg(UserQuizzes.score),
+        db.func.max(UserQuizzes.score),
+        db.func.max(UserQuizzes.completed_at)
+    ).where(
+        UserQuizzes.completed == True
+    ).group_by(
+        UserQuizzes.user_id
+    )
+    daily = UserDailyPerformance.__table__
+    day = db.func.date(UserQuizzes.completed_at)
+    completed_daily = db.select(
+        UserQuizzes.user_id,
+        day,
+        db.func.count(UserQuizzes.id),
+        db.func.sum(UserQuizzes.score)
+    ).where(
+        UserQuizzes.completed == True
+    ).group_by(
+        UserQuizzes.user_id, day
+    )
+
+    delete = table.delete()
+    delete_daily = daily.delete()
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        completed = completed.where(UserQuizzes.user_id.in_(user_ids))
+        completed_daily = completed_daily.where(UserQuizzes.user_id.in_(user_ids))
+        delete = delete.where(table.c.user_id.in_(user_ids))
+        delete_daily = delete_daily.where(daily.c.user_id.in_(user_ids))
+
+    bump_version(RESULTS)
+    db.session.execute(delete)
+    db.session.execute(delete_daily)
+    result = db.session.execute(table.insert().from_select(
+        ['user_id', 'attempt_count', 'score_sum', 'average_score', 'best_score', 'last_attempt_at'],
+        completed
+    ))
+    db.session.execute(daily.insert().from_select(
+        ['user_id', 'day', 'attempt_count', 'score_sum'],
+        completed_daily
+    ))
+    return result.rowcount
+
+
+def average_scores():
+    """Return {user_id: average score rounded to one decimal} for every student with attempts."""
+    rows = db.session.query(UserPerformance.user_id, UserPerformance.average_score).all()
+    return {user_id: round(average, 1) for user_id, average in rows}
+
+
+def attempt_count(user_id):
+    count = db.session.query(UserPerformance.attempt_count).filter_by(user_id=user_id).scalar()
+    return count or 0
+
+
+def subject_averages(user_id):
+    """Return [(subject name, average score)] for the subjects the student attempted."""
+    return db.session.query(
+        Subject.name,
+        db.func.round(db.func.avg(UserQuizzes.score), 2)
+    ).join(
+        Quiz, UserQuizzes.quiz_id == Quiz.id
+    ).join(
+        Chapter, Quiz.chapter_id == Chapter.id
+    ).join(
+        Subject, Quiz.subject_id == Subject.id
+    ).filter(
+        UserQuizzes.user_id == user_id,
+        UserQuizzes.completed == True
+    ).group_by(
+        Subject.id, Subject.name
+    ).order_by(
+        Subject.id
+    ).all()
+
+
+def chapter_averages(user_id):
+    """Return [(chapter title, average score)] for the chapters the student attempted."""
+    return db.session.query(
+        Chapter.title,
+        db.func.round(db.func.avg(UserQuizzes.score), 2)
+    ).join(
+        Quiz, UserQuizzes.quiz_id == Quiz.id
+    ).join(
+        Chapter, Quiz.chapter_id == Chapter.id
+    ).filter(
+        UserQuizzes.user_id == user_id,
+        UserQuizzes.completed == True
+    ).group_by(
+        Chapter.id, Chapter.title
+    ).order_by(
+        Chapter.id
+    ).all()
+
+
+def running_averages(user_id):
+    """Return [(date label, running average score)], one point per attempt."""
+    running = db.func.avg(UserQuizzes.score).over(
+        order_by=(UserQuizzes.completed_at, UserQuizzes.id),
+        rows=(None, 0)
+    )
+    rows = db.session.query(
+        UserQuizzes.completed_at,
+        running
+    ).filter(
+        UserQuizzes.user_id == user_id,
+        UserQuizzes.completed == True
+    ).order_by(
+        UserQuizzes.completed_at, UserQuizzes.id
+    ).all()
+    return [(completed_at.strftime('%Y-%m-%d'), round(average, 2)) for completed_at, average in rows]
+
+
+def daily_running_averages(user_id):
+    """Return [(date label, running average score)], one point per day.
+
+    Reads the daily rollup, so the cost follows the number of active days
+    rather than the number of attempts.
+    """
+    running_sum = db.func.sum(UserDailyPerformance.score_sum).over(order_by=UserDailyPerformance.day)
+    running_count = db.func.sum(UserDailyPerformance.attempt_count).over(order_by=UserDailyPerformance.day)
+    rows = db.session.query(
+        UserDailyPerformance.day,
+        running_sum,
+        running_count
+    ).filter(
+        UserDailyPerformance.user_id == user_id
+    ).order_by(
+        UserDailyPerformance.day
+    ).all()
+    return [(day.strftime('%Y-%m-%d'), round(total / count, 2)) for day, total, count in rows]
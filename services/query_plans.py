@@ -0,0 +1,33 @@
+from sqlalchemy import text
+from models import db, Subject, Chapter, Quiz, Question, UserQuizzes
+
+
+def hot_queries():
+    """Representative statements for the hottest filters in app.py, with sample ids."""
+    return {
+        'student assignments (student_dashboard, student_quiz)': db.select(
+            UserQuizzes.quiz_id, UserQuizzes.completed, UserQuizzes.completed_at
+        ).where(UserQuizzes.user_id == 1),
+        'single assignment (take_quiz, submit_quiz)': db.select(UserQuizzes.id).where(
+            UserQuizzes.user_id == 1, UserQuizzes.quiz_id == 1
+        ),
+        'completed attempts by date (admin_quiz_results)': db.select(UserQuizzes.id).where(
+            UserQuizzes.completed == True
+        ).order_by(UserQuizzes.completed_at.desc()),
+        'questions of a quiz (get_quiz, take_quiz)': db.select(Question.id).where(Question.quiz_id == 1),
+        'chapters of a subject (get_chapters)': db.select(Chapter.id, Chapter.title).where(
+            Chapter.subject_id == 1
+        ).order_by(Chapter.order),
+        'quizzes of a chapter (content tree)': db.select(Quiz.id).where(Quiz.chapter_id == 1),
+        'subject lookup': db.select(Subject.name).where(Subject.id == 1),
+    }
+
+
+def explain_hot_queries():
+    """Return {query name: [plan detail lines]} from SQLite's EXPLAIN QUERY PLAN."""
+    report = {}
+    for name, statement in hot_queries().items():
+        sql = str(statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+        rows = db.session.execute(text('EXPLAIN QUERY PLAN ' + sql)).all()
+        report[name] = [row[-1] for row in rows]
+    return report
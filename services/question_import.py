@@ -0,0 +1,122 @@
+import csv
+import io
+import json
+from models import db, Question
+from services.bulk_insert import insert_rows
+from services.question_search import index_question_bands
+from services.quiz_meta import adjust_question_count
+from services.versions import bump_version, quiz_version_name
+
+FORMATS = ('csv', 'jsonl')
+
+
+def detect_format(filename, requested=None):
+    """Pick 'csv' or 'jsonl' from an explicit request or the file extension."""
+    if requested:
+        return requested.lower() if requested.lower() in FORMATS else None
+    name = (filename or '').lower()
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    return None
+
+
+def iter_rows(text_stream, fmt):
+    """Yield (line number, raw row) pairs one at a time; a row that cannot be
+    parsed is yielded as an exception instance so the caller can report it."""
+    if fmt == 'csv':
+        reader = csv.DictReader(text_stream)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_no, line in enumerate(text_stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except ValueError as e:
+                yield line_no, e
+
+
+def parse_question(row):
+    """Validate one raw row. Returns (title, options, correct_answer) or raises ValueError."""
+    if isinstance(row, Exception):
+        raise ValueError(f"Invalid JSON: {row}")
+    if not isinstance(row, dict):
+        raise ValueError("Row must be an object")
+
+    title = row.get('title')
+    if not isinstance(title, str) or not title.strip():
+        raise ValueError("title is required")
+    if len(title) > 500:
+        raise ValueError("title is longer than 500 characters")
+
+    options = row.get('options')
+    if isinstance(options, str):
+        # CSV cells carry a JSON array, or options separated by '|'
+        options = json.loads(options) if options.strip().startswith('[') else options.split('|')
+    if not isinstance(options, list) or len(options) < 2:
+        raise ValueError("options must be a list of at least two choices")
+    if not all(isinstance(option, str) and option.strip() for option in options):
+        raise ValueError("options must be non-empty strings")
+
+    correct_answer = row.get('correct_answer')
+    if isinstance(correct_answer, str) and correct_answer.strip().lstrip('-').isdigit():
+        correct_answer = int(correct_answer)
+    if not isinstance(correct_answer, int) or isinstance(correct_answer, bool):
+        raise ValueError("correct_answer must be an integer")
+    if not 0 <= correct_answer < len(options):
+        raise ValueError(f"correct_answer must be between 0 and {len(options) - 1}")
+
+    return title.strip(), [option.strip() for option in options], correct_answer
+
+
+def import_questions(quiz_id, binary_stream, fmt, batch_size=1000, max_errors=20):
+    """Stream questions from a CSV or JSONL file into ``quiz_id``.
+
+    Rows are validated one at a time and inserted in batches, each batch in
+    its own transaction, so memory use depends on ``batch_size`` rather than
+    the file size. Invalid rows are skipped; the first ``max_errors`` of them
+    are reported with their line numbers.
+    """
+    text_stream = io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='')
+    summary = {'imported': 0, 'rejected': 0, 'aborted': False, 'errors': []}
+    batch = []
+
+    def flush():
+        if batch:
+            ids = insert_rows(Question, batch)
+            index_question_bands((question_id, row['title'], row['options']) for question_id, row in zip(ids, batch))
+            adjust_question_count(quiz_id, len(batch))
+            bump_version(quiz_version_name(quiz_id))
+            db.session.commit()
+            summary['imported'] += len(batch)
+            batch.clear()
+
+    try:
+        for line_no, row in iter_rows(text_stream, fmt):
+            try:
+                title, options, correct_answer = parse_question(row)
+            except ValueError as e:
+                summary['rejected'] += 1
+                if len(summary['errors']) < max_errors:
+                    summary['errors'].append({'line': line_no, 'message': str(e)})
+                continue
+            batch.append({
+                'quiz_id': quiz_id,
+                'title': title,
+                'options': options,
+                'correct_answer': correct_answer
+            })
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+    except (csv.Error, UnicodeDecodeError) as e:
+        # The file itself is unreadable past this point; keep what was committed
+        db.session.rollback()
+        summary['aborted'] = True
+        summary['errors'].append({'line': None, 'message': f"Stopped reading file: {e}"})
+    finally:
+        text_stream.detach()
+    return summary
@@ -0,0 +1,272 @@
+import json
+import random
+import re
+from sqlalchemy import text
+from models import db, Question, Quiz, QuestionBand
+
+try:
+    import numpy as np
+except ImportError:  # Signatures fall back to plain Python loops
+    np = None
+
+# Words for the FTS query and the duplicate check; punctuation is dropped
+_WORD = re.compile(r'\w+')
+MAX_QUERY_TERMS = 16
+
+# MinHash over byte shingles of the normalized text, split into LSH bands of BAND_ROWS values.
+# With 16 bands of 4 rows a pair at Jaccard 0.7 shares a bucket with
+# probability 0.99, and a pair at 0.3 only about 12% of the time.
+SHINGLE_SIZE = 5
+BANDS = 16
+BAND_ROWS = 4
+NUM_HASHES = BANDS * BAND_ROWS
+# Upper bound on questions compared exactly, for banks full of templated text
+MAX_CANDIDATES = 200
+_MASK = (1 << 64) - 1
+# Multiply-shift hash family over packed shingles: h(x) = ((a * x + b) mod 2**64) >> 32
+# with odd a; a band's values are combined as sum(value * mix) mod 2**64
+_rng = random.Random(20240617)
+_HASH_A = [_rng.getrandbits(64) | 1 for _ in range(NUM_HASHES)]
+_HASH_B = [_rng.getrandbits(64) for _ in range(NUM_HASHES)]
+_BAND_MIX = [_rng.getrandbits(64) | 1 for _ in range(BAND_ROWS)]
+if np is not None:
+    _NP_A = np.array(_HASH_A, dtype=np.uint64)[:, None]
+    _NP_B = np.array(_HASH_B, dtype=np.uint64)[:, None]
+    _NP_MIX = np.array(_BAND_MIX, dtype=np.uint64)
+
+
+def create_search_index(conn):
+    """Create the FTS5 table over question text and the triggers that keep it in sync.
+
+    Triggers cover every write path (ORM, bulk inserts, cascades), so no
+    caller has to maintain the index. Options are indexed as their decoded
+    strings, not as the stored JSON. Removing a question also drops its
+    LSH buckets.
+    """
+    conn.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS question_fts USING fts5("
+        "title, options, tokenize = 'porter unicode61 remove_diacritics 2')"
+    ))
+    options_text = "(SELECT group_concat(value, ' ') FROM json_each({}.options))"
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS question_fts_insert AFTER INSERT ON question BEGIN
+            INSERT INTO question_fts (rowid, title, options) VALUES (new.id, new.title, {options_text.format('new')});
+        END
+    """))
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS question_fts_update AFTER UPDATE OF title, options ON question BEGIN
+            DELETE FROM question_fts WHERE rowid = old.id;
+            INSERT INTO question_fts (rowid, title, options) VALUES (new.id, new.title, {options_text.format('new')});
+        END
+    """))
+    conn.execute(text("""
+        CREATE TRIGGER IF NOT EXISTS question_fts_delete AFTER DELETE ON question BEGIN
+            DELETE FROM question_fts WHERE rowid = old.id;
+            DELETE FROM question_band WHERE question_id = old.id;
+        END
+    """))
+
+
+def suspend_search_index(conn):
+    """Drop the FTS insert trigger for a bulk load, inside the loading transaction.
+
+    The loader then calls rebuild_search_index with the last id before the
+    load and create_search_index to restore the trigger.
+    """
+    conn.execute(text('DROP TRIGGER IF EXISTS question_fts_insert'))
+
+
+def rebuild_search_index(conn, after_id=0):
+    """Refill the FTS table from the question table, or only add questions with ids above ``after_id``."""
+    if not after_id:
+        conn.execute(text('DELETE FROM question_fts'))
+    conn.execute(text(
+        'INSERT INTO question_fts (rowid, title, options) '
+        "SELECT id, title, (SELECT group_concat(value, ' ') FROM json_each(question.options)) FROM question "
+        'WHERE id > :after_id'
+    ), {'after_id': after_id})
+
+
+def match_expression(query):
+    """Turn free text into an FTS5 query: every word must match, the last one as a prefix.
+
+    Words are quoted, so FTS operators and punctuation typed by the user
+    cannot cause a syntax error. Returns None when there is nothing to search.
+    """
+    words = _WORD.findall(query or '')[:MAX_QUERY_TERMS]
+    if not words:
+        return None
+    return ' '.join(f'"{word}"' for word in words[:-1]) + (' ' if len(words) > 1 else '') + f'"{words[-1]}"*'
+
+
+def search_questions(query, quiz_id=None, subject_id=None, page=1, per_page=20):
+    """Rank questions by BM25 relevance, title matches weighted above options.
+
+    Returns (results, has_more). Each result carries a snippet with the
+    matching words wrapped in <mark>.
+    """
+    expression = match_expression(query)
+    if expression is None:
+        return [], False
+    filters = ''
+    params = {'expression': expression, 'limit': per_page + 1, 'offset': (page - 1) * per_page}
+    if quiz_id:
+        filters += ' AND question.quiz_id = :quiz_id'
+        params['quiz_id'] = quiz_id
+    if subject_id:
+        filters += ' AND quiz.subject_id = :subject_id'
+        params['subject_id'] = subject_id
+    rows = db.session.execute(text(f"""
+        SELECT question.id, question.quiz_id, quiz.title AS quiz_title, question.title, question.options,
+               snippet(question_fts, -1, '<mark>', '</mark>', '…', 12) AS snippet,
+               bm25(question_fts, 2.0, 1.0) AS rank
+        FROM question_fts
+        JOIN question ON question.id = question_fts.rowid
+        JOIN quiz ON quiz.id = question.quiz_id
+        WHERE question_fts MATCH :expression{filters}
+        ORDER BY rank, question.id
+        LIMIT :limit OFFSET :offset
+    """), params).all()
+    results = [{
+        'question_id': row.id,
+        'quiz_id': row.quiz_id,
+        'quiz_title': row.quiz_title,
+        'title': row.title,
+        'options': json.loads(row.options),
+        'snippet': row.snippet,
+        'score': round(-row.rank, 4)
+    } for row in rows[:per_page]]
+    return results, len(rows) > per_page
+
+
+def _normalized(title, options):
+    # Lower-cased words joined by single spaces, padded to at least one shingle
+    return ' '.join(_WORD.findall(' '.join([title, *options]).lower())).encode().ljust(SHINGLE_SIZE, b'\0')
+
+
+def _shingles(title, options):
+    """Return the question's SHINGLE_SIZE-byte shingles, each packed into an int."""
+    data = _normalized(title, options)
+    return {int.from_bytes(data[i:i + SHINGLE_SIZE], 'little') for i in range(len(data) - SHINGLE_SIZE + 1)}
+
+
+def _to_signed(value):
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def bucket_lists(questions):
+    """Return the BANDS LSH bucket ids (signed 64-bit) of each (title, options) pair.
+
+    Each question gets a NUM_HASHES-value MinHash signature over its
+    shingles; every band of BAND_ROWS values is then mixed into one bucket
+    id. With numpy the shingles and signatures of the whole list are
+    computed in a few array operations.
+    """
+    if np is None:
+        result = []
+        for title, options in questions:
+            shingles = _shingles(title, options)
+            signature = [min(((a * x + b) & _MASK) >> 32 for x in shingles) for a, b in zip(_HASH_A, _HASH_B)]
+            result.append([
+                _to_signed(sum(value * mix for value, mix in zip(signature[band * BAND_ROWS:], _BAND_MIX)) & _MASK)
+                for band in range(BANDS)
+            ])
+        return result
+
+    texts = [_normalized(title, options) for title, options in questions]
+    data = np.frombuffer(b''.join(texts), dtype=np.uint8).astype(np.uint64)
+    # Pack the bytes at every position into a shingle, then keep the windows inside one text
+    windows = sum(data[k:len(data) - SHINGLE_SIZE + 1 + k] << np.uint64(8 * k) for k in range(SHINGLE_SIZE))
+    counts = np.array([len(text) - SHINGLE_SIZE + 1 for text in texts])
+    text_starts = np.concatenate(([0], np.cumsum([len(text) for text in texts])[:-1]))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    x = windows[np.repeat(text_starts - starts, counts) + np.arange(counts.sum())][None, :]
+    signatures = np.minimum.reduceat((_NP_A * x + _NP_B) >> np.uint64(32), starts, axis=1).T
+    buckets = (signatures.reshape(len(texts), BANDS, BAND_ROWS) * _NP_MIX).sum(axis=2, dtype=np.uint64)
+    return buckets.view(np.int64).tolist()
+
+
+def question_band_rows(questions, chunk_size=1000):
+    """Return (band, bucket, question_id) rows for questions given as (id, title, options)."""
+    questions = list(questions)
+    rows = []
+    for start in range(0, len(questions), chunk_size):
+        chunk = questions[start:start + chunk_size]
+        buckets = bucket_lists([(title, options) for _, title, options in chunk])
+        rows.extend(
+            (band, bucket, question_id)
+            for (question_id, _, _), question_buckets in zip(chunk, buckets)
+            for band, bucket in enumerate(question_buckets)
+        )
+    return rows
+
+
+def insert_question_bands(conn, rows):
+    # Sixteen rows per question: plain tuples through the driver keep bulk imports fast
+    if rows:
+        conn.exec_driver_sql('INSERT INTO question_band (band, bucket, question_id) VALUES (?, ?, ?)', rows)
+
+
+def index_question_bands(questions):
+    """Add LSH buckets for newly inserted questions, given as (id, title, options). The caller commits."""
+    insert_question_bands(db.session.connection(), question_band_rows(questions))
+
+
+def rebuild_question_bands(chunk_size=2000, after_id=0):
+    """Recompute the LSH buckets of every question, or only add those of ids above ``after_id``. The caller commits.
+
+    A full rebuild drops the question_id index for the load and builds it
+    once at the end, which is cheaper than maintaining it row by row.
+    """
+    connection = db.session.connection()
+    question_index = None
+    if not after_id:
+        db.session.execute(db.delete(QuestionBand))
+        question_index = next(index for index in QuestionBand.__table__.indexes
+                              if index.name == 'ix_question_band_question_id')
+        question_index.drop(bind=connection, checkfirst=True)
+    last_id = after_id
+    while True:
+        rows = db.session.query(Question.id, Question.title, Question.options).filter(
+            Question.id > last_id
+        ).order_by(Question.id).limit(chunk_size).all()
+        if not rows:
+            break
+        index_question_bands(rows)
+        last_id = rows[-1].id
+    if question_index is not None:
+        question_index.create(bind=connection)
+
+
+def find_near_duplicates(title, options, threshold=0.7, limit=5):
+    """Return existing questions whose text has Jaccard similarity >= ``threshold``.
+
+    Candidates come from the LSH buckets this text falls into, so the cost
+    depends on how many questions share a bucket, not on the size of the
+    bank; at most MAX_CANDIDATES are then checked exactly. Results are sorted by
+    similarity, highest first.
+    """
+    shingles = _shingles(title, options)
+    buckets = bucket_lists([(title, options)])[0]
+    # One equality pair per band: SQLite plans a row-value IN with LIMIT as a full scan
+    candidate_ids = db.session.query(QuestionBand.question_id).filter(db.or_(*[
+        db.and_(QuestionBand.band == band, QuestionBand.bucket == bucket) for band, bucket in enumerate(buckets)
+    ])).distinct().limit(MAX_CANDIDATES)
+    candidates = db.session.query(
+        Question.id, Question.quiz_id, Question.title, Question.options, Quiz.title.label('quiz_title')
+    ).join(Quiz, Question.quiz_id == Quiz.id).filter(Question.id.in_(candidate_ids)).all()
+
+    matches = []
+    for candidate in candidates:
+        other = _shingles(candidate.title, candidate.options)
+        similarity = len(shingles & other) / len(shingles | other)
+        if similarity >= threshold:
+            matches.append({
+                'question_id': candidate.id,
+                'quiz_id': candidate.quiz_id,
+                'quiz_title': candidate.quiz_title,
+                'title': candidate.title,
+                'similarity': round(similarity, 3)
+            })
+    matches.sort(key=lambda match: (-match['similarity'], match['question_id']))
+    return matches[:limit]
@@ -0,0 +1,197 @@
+import math
+from sqlalchemy.dialects.sqlite import insert
+from models import db, Question, UserQuizzes, QuestionStats, QuestionOptionStats
+from services.attempts import NO_ANSWER, unpack_ids
+
+# Thresholds used to flag questions in the admin report
+EASY_ABOVE = 0.9
+HARD_BELOW = 0.2
+DISCRIMINATION_BELOW = 0.1
+
+
+def _stats_rows(question_ids, selected, answer_key, score):
+    stats = []
+    options = []
+    for question_id, chosen, correct in zip(question_ids, selected, answer_key):
+        is_correct = chosen == correct
+        stats.append({
+            'question_id': question_id,
+            'attempts': 1,
+            'correct_count': 1 if is_correct else 0,
+            'score_sum': score,
+            'score_sq_sum': score * score,
+            'correct_score_sum': score if is_correct else 0.0
+        })
+        if chosen != NO_ANSWER:
+            options.append({'question_id': question_id, 'option_index': chosen, 'selected_count': 1})
+    return stats, options
+
+
+def _upsert_stats(stats, options):
+    if stats:
+        stmt = insert(QuestionStats.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['question_id'],
+            set_={column: QuestionStats.__table__.c[column] + stmt.excluded[column]
+                  for column in ('attempts', 'correct_count', 'score_sum', 'score_sq_sum', 'correct_score_sum')}
+        )
+        db.session.execute(stmt, stats)
+    if options:
+        stmt = insert(QuestionOptionStats.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['question_id', 'option_index'],
+            set_={'selected_count': QuestionOptionStats.__table__.c.selected_count + stmt.excluded.selected_count}
+        )
+        db.session.execute(stmt, options)
+
+
+def record_question_results(question_ids, selected, answer_key, score):
+    """Add one graded attempt to every question's running sums, on the caller's session."""
+    _upsert_stats(*_stats_rows(question_ids, selected, answer_key, score))
+
+
+def _summed_rows(attempts):
+    # Per-question and per-option totals over (question_ids, selected, answer_key, score) attempts
+    stats = {}
+    options = {}
+    for attempt in attempts:
+        stats_rows, option_rows = _stats_rows(*attempt)
+        for row in stats_rows:
+            total = stats.setdefault(row['question_id'], dict.fromkeys(row, 0))
+            for column, value in row.items():
+                total[column] = value if column == 'question_id' else total[column] + value
+        for row in option_rows:
+            key = (row['question_id'], row['option_index'])
+            total = options.setdefault(key, dict(row, selected_count=0))
+            total['selected_count'] += row['selected_count']
+    return list(stats.values()), list(options.values())
+
+
+def record_many_question_results(attempts):
+    """Add many (question_ids, selected, answer_key, score) attempts with one upsert batch per table."""
+    _upsert_stats(*_summed_rows(attempts))
+
+
+def forget_user_question_results(user_id):
+    """Subtract a deleted student's completed attempts from every question's running sums."""
+    attempts = db.session.query(
+        UserQuizzes.score, UserQuizzes.question_ids, UserQuizzes.selected_answers, UserQuizzes.answer_key
+    ).filter(
+        UserQuizzes.user_id == user_id,
+        UserQuizzes.completed == True,
+        UserQuizzes.question_ids.isnot(None)
+    ).all()
+    stats, options = _summed_rows(
+        (unpack_ids(attempt.question_ids), attempt.selected_answers, attempt.answer_key, attempt.score)
+        for attempt in attempts
+    )
+    # Adding the negated totals through the upsert subtracts them from the existing rows
+    _upsert_stats(
+        [{column: value if column == 'question_id' else -value for column, value in row.items()} for row in stats],
+        [dict(row, selected_count=-row['selected_count']) for row in options]
+    )
+    # A recompute would not have rows for questions or options nobody else chose
+    question_ids = [row['question_id'] for row in stats]
+    db.session.execute(db.delete(QuestionStats).where(
+        QuestionStats.question_id.in_(question_ids), QuestionStats.attempts <= 0
+    ))
+    db.session.execute(db.delete(QuestionOptionStats).where(
+        QuestionOptionStats.question_id.in_(question_ids), QuestionOptionStats.selected_count <= 0
+    ))
+
+
+def forget_questions(question_ids):
+    """Drop the statistics of deleted questions. ``question_ids`` may be a subquery."""
+    db.session.execute(db.delete(QuestionStats).where(QuestionStats.question_id.in_(question_ids)))
+    db.session.execute(db.delete(QuestionOptionStats).where(QuestionOptionStats.question_id.in_(question_ids)))
+
+
+def rebuild_question_stats(chunk_size=1000):
+    """Recompute every question's statistics from the stored attempts. The caller commits."""
+    db.session.execute(db.delete(QuestionStats))
+    db.session.execute(db.delete(QuestionOptionStats))
+    last_id = 0
+    while True:
+        attempts = db.session.query(
+            UserQuizzes.id, UserQuizzes.score, UserQuizzes.question_ids,
+            UserQuizzes.selected_answers, UserQuizzes.answer_key
+        ).filter(
+            UserQuizzes.completed == True,
+            UserQuizzes.question_ids.isnot(None),
+            UserQuizzes.id > last_id
+        ).order_by(UserQuizzes.id).limit(chunk_size).all()
+        if not attempts:
+            break
+        record_many_question_results(
+            (unpack_ids(attempt.question_ids), attempt.selected_answers, attempt.answer_key, attempt.score)
+            for attempt in attempts
+        )
+        last_id = attempts[-1].id
+
+
+def discrimination(stats):
+    """Point-biserial correlation between answering correctly and the attempt score.
+
+    Computed from the running sums, so it needs no rescan of attempts. Returns
+    None while every attempt is correct, every attempt is wrong, or the scores
+    have no spread.
+    """
+    n = stats.attempts
+    n1 = stats.correct_count
+    if n == 0 or n1 == 0 or n1 == n:
+        return None
+    mean = stats.score_sum / n
+    variance = stats.score_sq_sum / n - mean * mean
+    if variance <= 1e-9:
+        return None
+    mean_correct = stats.correct_score_sum / n1
+    mean_wrong = (stats.score_sum - stats.correct_score_sum) / (n - n1)
+    p = n1 / n
+    return (mean_correct - mean_wrong) / math.sqrt(variance) * math.sqrt(p * (1 - p))
+
+
+def quiz_question_report(quiz_id):
+    """Return difficulty, discrimination and option histograms for every question of a quiz."""
+    rows = db.session.query(
+        Question.id,
+        Question.title,
+        Question.options,
+        Question.correct_answer,
+        QuestionStats
+    ).outerjoin(
+        QuestionStats, QuestionStats.question_id == Question.id
+    ).filter(
+        Question.quiz_id == quiz_id
+    ).order_by(Question.id).all()
+
+    histograms = {}
+    for option in db.session.query(QuestionOptionStats).join(
+        Question, QuestionOptionStats.question_id == Question.id
+    ).filter(Question.quiz_id == quiz_id):
+        histograms.setdefault(option.question_id, {})[option.option_index] = option.selected_count
+
+    report = []
+    for question_id, title, options, correct_answer, stats in rows:
+        attempts = stats.attempts if stats else 0
+        difficulty = stats.correct_count / attempts if attempts else None
+        index = discrimination(stats) if stats else None
+        flags = []
+        if difficulty is not None and difficulty > EASY_ABOVE:
+            flags.append('too_easy')
+        if difficulty is not None and difficulty < HARD_BELOW:
+            flags.append('too_hard')
+        if index is not None and index < DISCRIMINATION_BELOW:
+            flags.append('low_discrimination')
+        counts = histograms.get(question_id, {})
+        report.append({
+            'question_id': question_id,
+            'title': title,
+            'attempts': attempts,
+            'correct_count': stats.correct_count if stats else 0,
+            'difficulty': round(difficulty, 4) if difficulty is not None else None,
+            'discrimination': round(index, 4) if index is not None else None,
+            'correct_answer': correct_answer,
+            'option_counts': [counts.get(position, 0) for position in range(len(options))],
+            'flags': flags
+        })
+    return report
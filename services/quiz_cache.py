@@ -0,0 +1,105 @@
+import threading
+from collections import OrderedDict, namedtuple
+from models import db, Subject, Quiz, Question
+from services.versions import get_version, quiz_version_name
+
+CompiledQuestion = namedtuple('CompiledQuestion', ['id', 'title', 'options'])
+CompiledQuiz = namedtuple('CompiledQuiz', [
+    'id', 'version', 'title', 'description', 'subject_id', 'chapter_id', 'subject_name', 'duration',
+    'questions', 'question_ids', 'answer_key'
+])
+
+
+class QuizCache:
+    """Bounded LRU of compiled quizzes keyed by (quiz id, content version).
+
+    A compiled quiz is immutable: the question tuple rendered by take_quiz,
+    plus the id and answer-key arrays submit_quiz grades against.
+    """
+
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            compiled = self._entries.get(key)
+            if compiled is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return compiled
+
+    def put(self, key, compiled):
+        with self._lock:
+            self._entries[key] = compiled
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, quiz_id):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == quiz_id]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
+quiz_cache = QuizCache()
+
+
+def _compile(quiz_id, version):
+    quiz = db.session.query(
+        Quiz.id, Quiz.title, Quiz.description, Quiz.subject_id, Quiz.chapter_id, Quiz.duration,
+        Subject.name.label('subject_name')
+    ).outerjoin(
+        Subject, Quiz.subject_id == Subject.id
+    ).filter(Quiz.id == quiz_id).first()
+    if not quiz:
+        return None
+
+    rows = db.session.query(
+        Question.id, Question.title, Question.options, Question.correct_answer
+    ).filter(Question.quiz_id == quiz_id).order_by(Question.id).all()
+    questions = tuple(CompiledQuestion(row.id, row.title, tuple(row.options)) for row in rows)
+    return CompiledQuiz(
+        id=quiz.id,
+        version=version,
+        title=quiz.title,
+        description=quiz.description,
+        subject_id=quiz.subject_id,
+        chapter_id=quiz.chapter_id,
+        subject_name=quiz.subject_name or 'Unknown Subject',
+        duration=quiz.duration,
+        questions=questions,
+        question_ids=tuple(question.id for question in questions),
+        answer_key=tuple(row.correct_answer for row in rows)
+    )
+
+
+def get_compiled_quiz(quiz_id):
+    """Return the compiled quiz for the current content version, or None if it does not exist."""
+    # Read the version first: rows changed after this point are recompiled
+    # on the next call because their bump moves the version on
+    version = get_version(quiz_version_name(quiz_id))
+    key = (quiz_id, version)
+    compiled = quiz_cache.get(key)
+    if compiled is None:
+        compiled = _compile(quiz_id, version)
+        if compiled is not None:
+            quiz_cache.put(key, compiled)
+    return compiled
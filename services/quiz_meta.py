@@ -0,0 +1,50 @@
+from models import db, Subject, Quiz, Question
+
+
+def adjust_question_count(quiz_id, delta):
+    """Shift a quiz's stored question count on the caller's session."""
+    db.session.execute(
+        db.update(Quiz).where(Quiz.id == quiz_id).values(question_count=Quiz.question_count + delta)
+    )
+
+
+def rebuild_question_counts():
+    """Recount every quiz's questions. The caller commits."""
+    counts = db.select(db.func.count(Question.id)).where(Question.quiz_id == Quiz.id).scalar_subquery()
+    db.session.execute(db.update(Quiz).values(question_count=counts))
+
+
+def quiz_metadata(quiz_id):
+    """Return the quiz's display fields and question count without reading Question rows,
+    or None if the quiz does not exist."""
+    row = db.session.query(
+        Quiz.id,
+        Quiz.title,
+        Quiz.description,
+        Quiz.subject_id,
+        Quiz.chapter_id,
+        Quiz.duration,
+        Quiz.question_count,
+        Subject.name.label('subject_name')
+    ).outerjoin(
+        Subject, Quiz.subject_id == Subject.id
+    ).filter(
+        Quiz.id == quiz_id
+    ).first()
+    if not row:
+        return None
+    return {
+        'id': row.id,
+        'title': row.title,
+        'description': row.description,
+        'subject_id': row.subject_id,
+        'chapter_id': row.chapter_id,
+        'subject_name': row.subject_name or 'Unknown Subject',
+        'duration': row.duration,
+        'question_count': row.question_count
+    }
+
+
+def question_ids(quiz_id):
+    """Question ids of a quiz, answered from the covering quiz_id index."""
+    return [row.id for row in db.session.query(Question.id).filter(Question.quiz_id == quiz_id).order_by(Question.id)]
@@ -0,0 +1,93 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from flask import current_app, request
+from services.versions import get_versions
+
+
+class ResponseCache:
+    """Bounded LRU of serialized JSON bodies, one entry per request path.
+
+    Each body is stored with the ETag it was built for. A write bumps a
+    version counter and so changes the ETag, which turns the old body into
+    a miss; the next build replaces it.
+    """
+
+    def __init__(self, max_size=512):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, path, etag):
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry[0] != etag:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, path, etag, body):
+        with self._lock:
+            self._entries[path] = (etag, body)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def record_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'not_modified': self.not_modified
+            }
+
+
+response_cache = ResponseCache()
+
+
+def cached_json(version_names, build):
+    """Serve a JSON payload with a strong ETag derived from version counters.
+
+    The ETag covers the request path and query string and the current value
+    of each counter in ``version_names``. A matching If-None-Match gets a
+    304 after reading only those counters; otherwise the body comes from
+    the response cache or from ``build()``. ``build`` returns the payload
+    dict, or a finished response for errors, which is passed through
+    uncached.
+    """
+    versions = get_versions(*version_names)
+    path = request.full_path
+    etag = hashlib.sha1(f'{path}|{versions}'.encode()).hexdigest()
+
+    if request.if_none_match.contains(etag):
+        response_cache.record_not_modified()
+        response = current_app.response_class(status=304)
+    else:
+        body = response_cache.get(path, etag)
+        if body is None:
+            payload = build()
+            if not isinstance(payload, dict):
+                return payload
+            body = current_app.json.dumps(payload)
+            response_cache.put(path, etag, body)
+        response = current_app.response_class(body, mimetype='application/json')
+
+    response.set_etag(etag)
+    # Auth-protected: browsers may keep it but must revalidate every time
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,74 @@
+from datetime import datetime
+from models import db, User, Subject, Quiz, UserQuizzes
+
+
+def encode_cursor(completed_at, user_quiz_id):
+    return f"{completed_at.isoformat()}_{user_quiz_id}"
+
+
+def decode_cursor(cursor):
+    """Return (completed_at, id) from a cursor string, or raise ValueError."""
+    completed_at, _, user_quiz_id = cursor.rpartition('_')
+    return datetime.fromisoformat(completed_at), int(user_quiz_id)
+
+
+def results_page(cursor=None, subject_id=None, quiz_id=None, student_id=None, limit=50):
+    """Return one page of completed attempts, newest first, and the cursor of the next page.
+
+    Keyset pagination on (completed_at, id) with a single joined projection;
+    the per-question attempt payload is never loaded.
+    """
+    query = db.session.query(
+        UserQuizzes.id.label('user_quiz_id'),
+        UserQuizzes.completed_at,
+        UserQuizzes.score,
+        UserQuizzes.correct_count.label('correct_answers'),
+        UserQuizzes.total_questions,
+        User.full_name.label('student_name'),
+        Quiz.id.label('quiz_id'),
+        Quiz.title.label('quiz_title'),
+        Quiz.duration,
+        Subject.name.label('subject_name')
+    ).join(
+        User, UserQuizzes.user_id == User.id
+    ).join(
+        Quiz, UserQuizzes.quiz_id == Quiz.id
+    ).outerjoin(
+        Subject, Quiz.subject_id == Subject.id
+    ).filter(
+        UserQuizzes.completed == True
+    )
+
+    if subject_id:
+        query = query.filter(Quiz.subject_id == subject_id)
+    if quiz_id:
+        query = query.filter(UserQuizzes.quiz_id == quiz_id)
+    if student_id:
+        query = query.filter(UserQuizzes.user_id == student_id)
+    if cursor:
+        completed_at, user_quiz_id = decode_cursor(cursor)
+        query = query.filter(
+            db.tuple_(UserQuizzes.completed_at, UserQuizzes.id) < db.tuple_(completed_at, user_quiz_id)
+        )
+
+    rows = query.order_by(
+        UserQuizzes.completed_at.desc(), UserQuizzes.id.desc()
+    ).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].completed_at, rows[-1].user_quiz_id)
+
+    return [{
+        'student_name': row.student_name,
+        'quiz_title': row.quiz_title,
+        'subject_name': row.subject_name or 'Unknown Subject',
+        'completed_at': row.completed_at,
+        'score': row.score,
+        'total_questions': row.total_questions or 0,
+        'correct_answers': row.correct_answers or 0,
+        'quiz_id': row.quiz_id,
+        'user_quiz_id': row.user_quiz_id,
+        'duration': row.duration
+    } for row in rows], next_cursor
@@ -0,0 +1,231 @@
+import io
+import json
+import math
+import subprocess
+import time
+from datetime import datetime
+from sqlalchemy import event
+from models import db, User, Subject, Chapter, Quiz, Question, UserQuizzes, UserPerformance
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class RouteBenchmark:
+    """Drive the app's routes through the Flask test client and time them.
+
+    Read routes run ``iterations`` times as an admin or as the student with
+    the most attempts. Write routes run as one create/edit/delete cycle per
+    iteration on throwaway content, plus one submit_quiz per pending
+    assignment and one register/delete_user pair, so repeated runs leave the
+    seeded data as it was apart from consumed assignments. Point the app at
+    a scratch database (QUIZZER_DATABASE_URI) before running it.
+    """
+
+    def __init__(self, app, iterations=20, admin_username='admin1', admin_password='admin'):
+        self.app = app
+        self.iterations = iterations
+        self.admin_username = admin_username
+        self.admin_password = admin_password
+        self.samples = {}
+        self.timings = {}
+        self._queries = 0
+        self._adapter = app.url_map.bind('localhost')
+        self._run_tag = int(time.time())
+
+    def _count_query(self, *args):
+        self._queries += 1
+
+    def _client(self, user_id=None, role=None):
+        client = self.app.test_client()
+        if user_id is not None:
+            with client.session_transaction() as session:
+                session['user_id'] = user_id
+                session['role'] = role
+        return client
+
+    def _request(self, client, method, path, **kwargs):
+        rule, _ = self._adapter.match(path.split('?', 1)[0], method=method, return_rule=True)
+        self._queries = 0
+        started = time.perf_counter()
+        # Buffered, so a streamed body is generated inside the timing
+        response = client.open(path, method=method, buffered=True, **kwargs)
+        elapsed = time.perf_counter() - started
+        entry = self.timings.setdefault(f'{method} {rule.rule}', {
+            'endpoint': rule.endpoint, 'latencies': [], 'queries': [], 'statuses': {}
+        })
+        entry['latencies'].append(elapsed)
+        entry['queries'].append(self._queries)
+        entry['statuses'][str(response.status_code)] = entry['statuses'].get(str(response.status_code), 0) + 1
+        return response
+
+    def _sample(self):
+        """Pick the ids the scenarios need from the current database."""
+        admin = db.session.query(User.id).filter_by(username=self.admin_username, role='admin').scalar()
+        student = db.session.query(UserPerformance.user_id).order_by(UserPerformance.attempt_count.desc()).limit(1).scalar()
+        attempt = db.session.query(UserQuizzes.id).filter(UserQuizzes.completed == True).order_by(UserQuizzes.id.desc()).limit(1).scalar()
+        quiz = db.session.query(Quiz.id).order_by(Quiz.question_count.desc(), Quiz.id).limit(1).scalar()
+        subject = db.session.query(Chapter.subject_id).limit(1).scalar()
+        pending = db.session.query(UserQuizzes.user_id, UserQuizzes.quiz_id).join(
+            Quiz, UserQuizzes.quiz_id == Quiz.id
+        ).filter(
+            db.or_(UserQuizzes.completed == False, UserQuizzes.completed.is_(None)),
+            Quiz.question_count > 0
+        ).order_by(UserQuizzes.id).limit(self.iterations).all()
+        if None in (admin, student, attempt, quiz, subject):
+            raise RuntimeError("The database needs an admin, completed attempts and content; run 'flask seed-synthetic' first")
+        self.samples = {'admin': admin, 'student': student, 'user_quiz': attempt, 'quiz': quiz,
+                        'subject': subject, 'pending': pending}
+
+    def _read_routes(self):
+        s = self.samples
+        admin = [
+            '/admin_dashboard', '/admin_quiz', '/admin_users', '/admin/quiz_results',
+            f"/admin/quiz_result_detail/{s['user_quiz']}", f"/admin/question_stats/{s['quiz']}",
+            '/admin/cache_stats', '/metrics', '/stats', f"/get_chapters/{s['subject']}", f"/get_quiz/{s['quiz']}",
+            f"/admin/export_results?format=csv&subject_id={s['subject']}", '/admin/search_questions?q=question',
+            '/api/stats/subject-performance', '/api/stats/chapter-performance', '/api/stats/quiz-performance',
+            '/api/stats/user-averages', '/api/stats/quizzes-per-subject'
+        ]
+        student = ['/student_dashboard', '/student/quiz', '/student/quiz?status=pending&sort=title', '/api/student/quizzes', '/summary']
+        return [(path, 'admin') for path in admin] + [(path, 'student') for path in student] + [('/', None)]
+
+    def _content_cycle(self, admin, i):
+        tag = f'bench-{self._run_tag}-{i}'
+        self._request(admin, 'POST', '/create_subject', json={'name': tag, 'description': 'Benchmark'})
+        subject_id = db.session.query(Subject.id).filter_by(name=tag).order_by(Subject.id.desc()).limit(1).scalar()
+        chapter_id = self._request(admin, 'POST', '/create_chapter', json={
+            'subject_id': subject_id, 'title': tag, 'description': 'Benchmark', 'order': 1
+        }).get_json()['chapter']['id']
+        self._request(admin, 'PUT', f'/edit_chapter/{chapter_id}', json={'title': tag, 'description': 'Edited', 'order': 1})
+        quiz_id = self._request(admin, 'POST', '/create_quiz', json={
+            'subject_id': subject_id, 'chapter_id': chapter_id, 'title': tag, 'description': 'Benchmark', 'duration': 10
+        }).get_json()['quiz']['id']
+        self._request(admin, 'POST', '/edit_quiz', json={'quiz_id': quiz_id, 'title': tag, 'description': 'Edited'})
+        self._request(admin, 'POST', '/add_question', json={
+            'quiz_id': quiz_id, 'title': f'{tag} question', 'options': ['A', 'B', 'C', 'D'], 'correct_answer': 1
+        })
+        rows = '\n'.join(f'"{tag} imported {n}",A|B|C,{n % 3}' for n in range(20))
+        self._request(admin, 'POST', f'/import_questions/{quiz_id}', data={
+            'format': 'csv', 'file': (io.BytesIO(f'title,options,correct_answer\n{rows}\n'.encode()), 'questions.csv')
+        })
+        self._request(admin, 'POST', '/assign_quiz', json={'user_id': self.samples['student'], 'quiz_id': quiz_id})
+        self._request(admin, 'POST', '/assign_quizzes', json={'user_ids': [self.samples['student']], 'quiz_ids': [quiz_id]})
+        self._request(admin, 'POST', '/regrade_quiz', json={'quiz_id': quiz_id})
+        question_id = db.session.query(Question.id).filter_by(quiz_id=quiz_id).order_by(Question.id).limit(1).scalar()
+        self._request(admin, 'POST', '/delete_question', json={'question_id': question_id})
+        self._request(admin, 'POST', '/delete_quiz', json={'quiz_id': quiz_id})
+        self._request(admin, 'DELETE', f'/delete_chapter/{chapter_id}')
+
+    def _account_cycle(self, admin, i):
+        username = f'bench-{self._run_tag}-{i}'
+        self._request(self._client(), 'POST', '/register', data={
+            'full_name': 'Benchmark User', 'email': f'{username}@example.com', 'username': username,
+            'password': 'benchmark', 'qualification': 'N/A', 'date_of_birth': '2000-01-01'
+        })
+        self._request(self._client(), 'POST', '/login', data={
+            'username': self.admin_username, 'password': self.admin_password, 'role': 'admin'
+        })
+        self._request(self._client(self.samples['student'], 'student'), 'GET', '/logout')
+        user_id = db.session.query(User.id).filter_by(username=username).scalar()
+        self._request(admin, 'POST', '/delete_user', json={'user_id': user_id})
+
+    def _submit(self, user_id, quiz_id):
+        client = self._client(user_id, 'student')
+        self._request(client, 'GET', f'/take_quiz/{quiz_id}')
+        question_ids = [row.id for row in db.session.query(Question.id).filter_by(quiz_id=quiz_id)]
+        self._request(client, 'POST', f'/submit_quiz/{quiz_id}', data={
+            f'answer_{question_id}': '0' for question_id in question_ids
+        })
+
+    def run(self):
+        """Run every scenario and return the results document."""
+        self._sample()
+        admin = self._client(self.samples['admin'], 'admin')
+        student = self._client(self.samples['student'], 'student')
+        clients = {'admin': admin, 'student': student, None: self._client()}
+
+        event.listen(db.engine, 'before_cursor_execute', self._count_query)
+        started = time.perf_counter()
+        try:
+            # Reads first, so their caches are not invalidated by the writes
+            for _ in range(self.iterations):
+                for path, role in self._read_routes():
+                    self._request(clients[role], 'GET', path)
+            for i in range(self.iterations):
+                self._content_cycle(admin, i)
+                self._account_cycle(admin, i)
+                # Release the harness session's snapshot between cycles
+                db.session.rollback()
+            for user_id, quiz_id in self.samples['pending']:
+                self._submit(user_id, quiz_id)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', self._count_query)
+        elapsed = time.perf_counter() - started
+
+        covered = {entry['endpoint'] for entry in self.timings.values()}
+        routes = {}
+        for name, entry in sorted(self.timings.items()):
+            latencies = sorted(entry['latencies'])
+            queries = sorted(entry['queries'])
+            routes[name] = {
+                'endpoint': entry['endpoint'],
+                'requests': len(latencies),
+                'statuses': entry['statuses'],
+                'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+                'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+                'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+                'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+                'queries_p50': percentile(queries, 0.50),
+                'queries_max': queries[-1]
+            }
+        return {
+            'commit': _git_commit(),
+            'created_at': datetime.utcnow().isoformat(),
+            'iterations': self.iterations,
+            'elapsed_s': round(elapsed, 3),
+            'dataset': {
+                'subjects': Subject.query.count(),
+                'chapters': Chapter.query.count(),
+                'quizzes': Quiz.query.count(),
+                'questions': Question.query.count(),
+                'students': User.query.filter_by(role='student').count(),
+                'attempts': UserQuizzes.query.filter_by(completed=True).count()
+            },
+            'routes': routes,
+            'not_covered': sorted(
+                rule.endpoint for rule in self.app.url_map.iter_rules()
+                if rule.endpoint not in covered and rule.endpoint != 'static'
+            )
+        }
+
+
+def compare_results(baseline, current, tolerance=0.2):
+    """List routes whose p95 latency grew by more than ``tolerance`` or whose query count grew."""
+    regressions = []
+    for name, now in current['routes'].items():
+        before = baseline.get('routes', {}).get(name)
+        if before is None:
+            continue
+        if before['p95_ms'] and now['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']:.1f}ms -> {now['p95_ms']:.1f}ms")
+        if now['queries_max'] > before['queries_max']:
+            regressions.append(f"{name}: queries {before['queries_max']} -> {now['queries_max']}")
+    return regressions
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,96 @@
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from flask import request
+from sqlalchemy import event
+
+logger = logging.getLogger('quizzer.sql')
+
+# Expanded IN lists vary in length per call but are the same statement shape
+_IN_LIST = re.compile(r'\(\?(?:\s*,\s*\?)*\)')
+_SPACE = re.compile(r'\s+')
+
+
+def statement_shape(statement):
+    """Collapse whitespace and IN lists so repeated calls of one query compare equal."""
+    return _IN_LIST.sub('(?)', _SPACE.sub(' ', statement).strip())
+
+
+class SQLProfiler:
+    """Per-request query counts, DB time and repeated-statement (N+1) detection.
+
+    When enabled, engine events count every statement executed on the
+    request's thread. After the request the totals go out in X-DB-Queries,
+    X-DB-Time-Ms and X-DB-Repeated headers and in one JSON log line on the
+    'quizzer.sql' logger; a statement shape run more than
+    ``repeat_threshold`` times is logged as a warning. When disabled no
+    listener or hook is installed.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.repeat_threshold = 10
+        self._local = threading.local()
+
+    def init_app(self, app, engine):
+        self.enabled = app.config['SQL_PROFILING']
+        self.repeat_threshold = app.config['SQL_REPEAT_THRESHOLD']
+        if not self.enabled:
+            return
+        event.listen(engine, 'before_cursor_execute', self._before_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_execute)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.teardown_request(self._clear_request)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if getattr(self._local, 'shapes', None) is not None:
+            self._local.started = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        shapes = getattr(self._local, 'shapes', None)
+        if shapes is None:
+            return
+        self._local.db_time += time.perf_counter() - self._local.started
+        shapes[statement_shape(statement)] += 1
+
+    def _start_request(self):
+        self._local.shapes = Counter()
+        self._local.db_time = 0.0
+
+    def _clear_request(self, exc=None):
+        self._local.shapes = None
+
+    def current(self):
+        """Return (queries, db seconds, [(shape, count)] over the threshold) for this request."""
+        shapes = getattr(self._local, 'shapes', None) or Counter()
+        repeated = [(shape, count) for shape, count in shapes.most_common() if count > self.repeat_threshold]
+        return sum(shapes.values()), getattr(self._local, 'db_time', 0.0), repeated
+
+    def _finish_request(self, response):
+        queries, db_time, repeated = self.current()
+        response.headers['X-DB-Queries'] = str(queries)
+        response.headers['X-DB-Time-Ms'] = f'{db_time * 1000:.2f}'
+        response.headers['X-DB-Repeated'] = str(len(repeated))
+
+        record = {
+            'event': 'sql_profile',
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'queries': queries,
+            'db_ms': round(db_time * 1000, 2),
+            'repeated': [{'statement': shape[:300], 'count': count} for shape, count in repeated]
+        }
+        if repeated:
+            logger.warning(json.dumps(record))
+        else:
+            logger.info(json.dumps(record))
+        return response
+
+
+sql_profiler = SQLProfiler()
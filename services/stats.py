@@ -0,0 +1,162 @@
+from sqlalchemy.dialects.sqlite import insert
+from models import db, Quiz, UserQuizzes, UserPerformance, PerformanceAggregate
+from services.performance import rebuild_user_performance
+from services.versions import RESULTS, bump_version
+
+SCOPES = ('subject', 'chapter', 'quiz')
+
+
+def _scope_columns():
+    return {'subject': Quiz.subject_id, 'chapter': Quiz.chapter_id, 'quiz': Quiz.id}
+
+
+def record_quiz_score(quiz, score):
+    """Add one completed attempt to the subject, chapter and quiz totals.
+
+    Three single-row upserts on the caller's session, committed with the
+    submission itself.
+    """
+    table = PerformanceAggregate.__table__
+    bump_version(RESULTS)
+    for scope, entity_id in (('subject', quiz.subject_id), ('chapter', quiz.chapter_id), ('quiz', quiz.id)):
+        stmt = insert(table).values(scope=scope, entity_id=entity_id, attempt_count=1, score_sum=score)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.scope, table.c.entity_id],
+            set_={
+                'attempt_count': table.c.attempt_count + 1,
+                'score_sum': table.c.score_sum + score
+            }
+        )
+        db.session.execute(stmt)
+
+
+def forget_quiz(quiz):
+    """Remove a deleted quiz's attempts from the totals it contributed to."""
+    table = PerformanceAggregate.__table__
+    bump_version(RESULTS)
+    totals = db.session.execute(
+        db.select(table.c.attempt_count, table.c.score_sum).where(
+            table.c.scope == 'quiz', table.c.entity_id == quiz.id
+        )
+    ).first()
+    if not totals:
+        return
+    for scope, entity_id in (('subject', quiz.subject_id), ('chapter', quiz.chapter_id)):
+        db.session.execute(
+            table.update().where(
+                table.c.scope == scope, table.c.entity_id == entity_id
+            ).values(
+                attempt_count=table.c.attempt_count - totals.attempt_count,
+                score_sum=table.c.score_sum - totals.score_sum
+            )
+        )
+    db.session.execute(table.delete().where(table.c.scope == 'quiz', table.c.entity_id == quiz.id))
+
+
+def forget_chapter(chapter):
+    """Drop a deleted chapter's totals and its quizzes' share of the subject totals."""
+    table = PerformanceAggregate.__table__
+    bump_version(RESULTS)
+    for quiz in chapter.quizzes:
+        forget_quiz(quiz)
+    db.session.execute(table.delete().where(table.c.scope == 'chapter', table.c.entity_id == chapter.id))
+
+
+def forget_user_attempts(user_id):
+    """Remove a deleted student's completed attempts from the subject, chapter and quiz totals."""
+    table = PerformanceAggregate.__table__
+    bump_version(RESULTS)
+    for scope in SCOPES:
+        totals = db.session.execute(
+            _recompute_query(scope).where(UserQuizzes.user_id == user_id)
+        ).all()
+        for entity_id, attempt_count, score_sum in totals:
+            db.session.execute(
+                table.update().where(
+                    table.c.scope == scope, table.c.entity_id == entity_id
+                ).values(
+                    attempt_count=table.c.attempt_count - attempt_count,
+                    score_sum=table.c.score_sum - score_sum
+                )
+            )
+
+
+def averages(scope):
+    """Return {entity id: average score} for one scope, read from the totals table."""
+    rows = db.session.query(
+        PerformanceAggregate.entity_id,
+        PerformanceAggregate.score_sum,
+        PerformanceAggregate.attempt_count
+    ).filter(
+        PerformanceAggregate.scope == scope,
+        PerformanceAggregate.attempt_count > 0
+    ).all()
+    return {entity_id: round(total / count, 2) for entity_id, total, count in rows}
+
+
+def _recompute_query(scope):
+    key = _scope_columns()[scope]
+    return db.select(
+        key,
+        db.func.count(UserQuizzes.id),
+        db.func.coalesce(db.func.sum(UserQuizzes.score), 0)
+    ).join(
+        Quiz, UserQuizzes.quiz_id == Quiz.id
+    ).where(
+        UserQuizzes.completed == True
+    ).group_by(key)
+
+
+def rebuild_stats():
+    """Regenerate every aggregate from the completed UserQuizzes rows. The caller commits."""
+    table = PerformanceAggregate.__table__
+    db.session.execute(table.delete())
+    for scope in SCOPES:
+        recompute = _recompute_query(scope).subquery()
+        db.session.execute(table.insert().from_select(
+            ['scope', 'entity_id', 'attempt_count', 'score_sum'],
+            db.select(db.literal(scope), *recompute.c)
+        ))
+    rebuild_user_performance()
+
+
+def _diff(scope, stored, expected, tolerance):
+    mismatches = []
+    for entity_id in sorted(set(stored) | set(expected)):
+        have = stored.get(entity_id, (0, 0))
+        want = expected.get(entity_id, (0, 0))
+        if have[0] != want[0] or abs(have[1] - want[1]) > tolerance:
+            mismatches.append((scope, entity_id, have, want))
+    return mismatches
+
+
+def check_stats_consistency(tolerance=1e-6):
+    """Compare the stored aggregates with a full recompute.
+
+    Returns a list of (scope, entity id, stored (count, sum), expected (count, sum))
+    for every row that disagrees, including the per-student rollup under the
+    'user' scope. An empty list means the tables are consistent.
+    """
+    mismatches = []
+    for scope in SCOPES:
+        expected = {row[0]: (row[1], row[2]) for row in db.session.execute(_recompute_query(scope))}
+        stored = {
+            row.entity_id: (row.attempt_count, row.score_sum)
+            for row in PerformanceAggregate.query.filter_by(scope=scope)
+        }
+        mismatches.extend(_diff(scope, stored, expected, tolerance))
+
+    expected = {
+        row[0]: (row[1], row[2]) for row in db.session.execute(
+            db.select(
+                UserQuizzes.user_id,
+                db.func.count(UserQuizzes.id),
+                db.func.coalesce(db.func.sum(UserQuizzes.score), 0)
+            ).where(
+                UserQuizzes.completed == True
+            ).group_by(UserQuizzes.user_id)
+        )
+    }
+    stored = {row.user_id: (row.attempt_count, row.score_sum) for row in UserPerformance.query}
+    mismatches.extend(_diff('user', stored, expected, tolerance))
+    return mismatches
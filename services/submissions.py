@@ -0,0 +1,167 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from models import db, UserQuizzes
+from services.performance import record_attempt
+from services.stats import record_quiz_score
+from services.question_stats import record_question_results
+
+
+def save_submission(user_id, quiz, attempt, score, completed_at, submission_key=None):
+    """Write one graded attempt and its rollups on the current session.
+
+    ``quiz`` is the compiled quiz the attempt was graded against and
+    ``attempt`` the column values from encode_attempt. The attempt row is
+    claimed with a single UPDATE guarded on ``completed = false``, so of two
+    concurrent submissions only one writes and updates the rollups. The
+    caller commits.
+
+    Returns (status, score): 'submitted' with the new score, 'duplicate'
+    with the stored score when ``submission_key`` matches the submission
+    that completed the attempt, 'already_completed' when another submission
+    did, or 'not_assigned' (score None).
+    """
+    values = dict(attempt, completed=True, completed_at=completed_at, score=score, submission_key=submission_key)
+    claimed = db.session.query(UserQuizzes).filter(
+        UserQuizzes.user_id == user_id,
+        UserQuizzes.quiz_id == quiz.id,
+        db.or_(UserQuizzes.completed == False, UserQuizzes.completed.is_(None))
+    ).update(values, synchronize_session=False)
+
+    if not claimed:
+        stored = db.session.query(UserQuizzes.score, UserQuizzes.submission_key).filter_by(
+            user_id=user_id, quiz_id=quiz.id
+        ).first()
+        if stored is None:
+            return 'not_assigned', None
+        if submission_key is not None and stored.submission_key == submission_key:
+            return 'duplicate', stored.score
+        return 'already_completed', stored.score
+
+    # Keep the per-student rollup in the same transaction
+    record_attempt(user_id, score, completed_at)
+    record_quiz_score(quiz, score)
+    record_question_results(list(quiz.question_ids), attempt['selected_answers'], attempt['answer_key'], score)
+    return 'submitted', score
+
+
+# Queued by shutdown() to stop the worker
+_STOP = object()
+
+
+class SubmissionQueue:
+    """Group commit for quiz submissions.
+
+    Request threads hand their write to a single worker thread and wait on
+    a future. The worker collects up to ``max_batch`` writes, or whatever
+    arrives within ``max_wait`` seconds of the first one, and commits them
+    in one transaction, so a burst of submissions costs one fsync per batch
+    instead of one per student. If the batch fails it is rolled back and
+    every write is retried in its own transaction, so each request gets
+    its own result or exception.
+    """
+
+    def __init__(self, max_batch=50, max_wait=0.005):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.app = None
+        self.batches = 0
+        self.writes = 0
+        self._jobs = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.max_batch = app.config['SUBMISSION_BATCH_SIZE']
+        self.max_wait = app.config['SUBMISSION_BATCH_WAIT_MS'] / 1000
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue ``fn(*args, **kwargs)`` for the next batch and wait for its result.
+
+        The caller's session is closed first so a waiting request does not
+        hold a pooled connection; objects it loaded become detached.
+        """
+        db.session.close()
+        self._start()
+        future = Future()
+        self._jobs.put((fn, args, kwargs, future))
+        return future.result()
+
+    def _start(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='submission-queue', daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            job = self._jobs.get()
+            if job is _STOP:
+                return
+            batch = [job]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    job = self._jobs.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if job is _STOP:
+                    stopping = True
+                    break
+                batch.append(job)
+            with self.app.app_context():
+                self._commit_batch(batch)
+
+    def shutdown(self):
+        """Stop the worker once the writes already queued are committed."""
+        with self._lock:
+            worker, self._worker = self._worker, None
+        if worker is not None and worker.is_alive():
+            self._jobs.put(_STOP)
+            worker.join()
+
+    def _commit_batch(self, batch):
+        try:
+            results = [fn(*args, **kwargs) for fn, args, kwargs, _ in batch]
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            # One bad write must not fail its neighbours
+            for job in batch:
+                self._commit_one(job)
+            return
+        self.batches += 1
+        self.writes += len(batch)
+        for (_, _, _, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _commit_one(self, job):
+        fn, args, kwargs, future = job
+        try:
+            result = fn(*args, **kwargs)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            future.set_exception(e)
+            return
+        self.batches += 1
+        self.writes += 1
+        future.set_result(result)
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'writes': self.writes,
+            'pending': self._jobs.qsize(),
+            'max_batch': self.max_batch,
+            'max_wait_ms': self.max_wait * 1000
+        }
+
+
+submission_queue = SubmissionQueue()
@@ -0,0 +1,127 @@
+import random
+from datetime import date, datetime, timedelta
+from werkzeug.security import generate_password_hash
+from models import db, User, Subject, Chapter, Quiz, Question, UserQuizzes
+from services.attempts import encode_attempt
+from services.bulk_insert import insert_rows
+from services.question_search import index_question_bands
+from services.question_stats import rebuild_question_stats
+from services.stats import rebuild_stats
+from services.versions import bump_version
+
+# Every synthetic student logs in with this password
+SYNTHETIC_PASSWORD = 'password'
+
+
+def generate_dataset(subjects=5, chapters_per_subject=8, quizzes_per_chapter=5, questions_per_quiz=10,
+                     students=500, attempts_per_student=20, pending_per_student=2, days=180,
+                     seed=1, batch_size=500, progress=None):
+    """Fill the database with a reproducible synthetic content bank and attempt history.
+
+    Each student gets ``attempts_per_student`` completed attempts and
+    ``pending_per_student`` open assignments on distinct quizzes. Answers
+    are drawn from a per-student ability and a per-question difficulty, and
+    stored in the compact attempt encoding submit_quiz writes. Names,
+    usernames and emails are tagged with ``seed``, so a seed can be loaded
+    once per database. Rollups, statistics and caches are rebuilt at the
+    end. ``progress``, if given, is called with (students seeded, students)
+    after each batch. Returns the number of rows created per model.
+    """
+    rng = random.Random(seed)
+    tag = f'synthetic{seed}'
+    now = datetime.utcnow()
+
+    subject_ids = insert_rows(Subject, [
+        {'name': f'Subject {seed}-{i + 1}', 'description': f'Synthetic subject {i + 1}', 'created_at': now}
+        for i in range(subjects)
+    ])
+    chapter_rows = [
+        {'title': f'Chapter {j + 1}', 'description': f'Synthetic chapter {j + 1}', 'subject_id': subject_id,
+         'order': j + 1, 'created_at': now}
+        for subject_id in subject_ids for j in range(chapters_per_subject)
+    ]
+    chapter_ids = insert_rows(Chapter, chapter_rows)
+    quiz_rows = [
+        {'title': f'Quiz {chapter_id}-{k + 1}', 'description': 'Synthetic quiz', 'subject_id': chapter['subject_id'],
+         'chapter_id': chapter_id, 'duration': rng.choice((10, 15, 20, 30)), 'question_count': questions_per_quiz}
+        for chapter_id, chapter in zip(chapter_ids, chapter_rows) for k in range(quizzes_per_chapter)
+    ]
+    quiz_ids = insert_rows(Quiz, quiz_rows)
+
+    # Per quiz: question ids, answer key, option counts and difficulty
+    quizzes = {}
+    for quiz_id in quiz_ids:
+        rows = []
+        for n in range(questions_per_quiz):
+            option_count = rng.choice((2, 4, 4, 4, 5))
+            rows.append({
+                'quiz_id': quiz_id,
+                'title': f'Synthetic question {n + 1} of quiz {quiz_id}',
+                'options': [f'Option {chr(65 + o)}' for o in range(option_count)],
+                'correct_answer': rng.randrange(option_count)
+            })
+        ids = insert_rows(Question, rows)
+        index_question_bands((question_id, row['title'], row['options']) for question_id, row in zip(ids, rows))
+        quizzes[quiz_id] = (
+            ids,
+            [row['correct_answer'] for row in rows],
+            [len(row['options']) for row in rows],
+            [rng.betavariate(2, 2) for _ in rows]
+        )
+    db.session.commit()
+
+    # One hash for every student keeps seeding fast
+    password = generate_password_hash(SYNTHETIC_PASSWORD)
+    per_student = min(attempts_per_student + pending_per_student, len(quiz_ids))
+    attempts = 0
+    pending = 0
+    for start in range(0, students, batch_size):
+        user_ids = insert_rows(User, [
+            {'full_name': f'Synthetic Student {i + 1}', 'email': f'{tag}_{i + 1}@example.com',
+             'username': f'{tag}_{i + 1}', 'password': password, 'role': 'student',
+             'qualification': 'Synthetic', 'date_of_birth': date(2000, 1, 1)}
+            for i in range(start, min(start + batch_size, students))
+        ])
+
+        completed_rows = []
+        pending_rows = []
+        for user_id in user_ids:
+            ability = rng.betavariate(5, 3)
+            chosen = rng.sample(quiz_ids, per_student)
+            for position, quiz_id in enumerate(chosen):
+                completed_at = now - timedelta(days=rng.uniform(0, days))
+                row = {'user_id': user_id, 'quiz_id': quiz_id, 'assigned_at': completed_at - timedelta(days=1)}
+                if position >= attempts_per_student:
+                    pending_rows.append(dict(row, completed=False))
+                    continue
+                question_ids, answer_key, option_counts, difficulty = quizzes[quiz_id]
+                selected = [
+                    correct if rng.random() < (ability + (1 - hardness)) / 2 else rng.randrange(options)
+                    for correct, options, hardness in zip(answer_key, option_counts, difficulty)
+                ]
+                attempt = encode_attempt(question_ids, selected, answer_key, content_version=0)
+                score = attempt['correct_count'] / len(question_ids) * 100 if question_ids else 0.0
+                completed_rows.append(dict(row, completed=True, completed_at=completed_at, score=score, **attempt))
+        for rows in (completed_rows, pending_rows):
+            if rows:
+                db.session.execute(db.insert(UserQuizzes), rows)
+        attempts += len(completed_rows)
+        pending += len(pending_rows)
+        db.session.commit()
+        if progress is not None:
+            progress(min(start + batch_size, students), students)
+
+    rebuild_stats()
+    rebuild_question_stats()
+    bump_version()
+    db.session.commit()
+
+    return {
+        'subjects': len(subject_ids),
+        'chapters': len(chapter_ids),
+        'quizzes': len(quiz_ids),
+        'questions': len(quiz_ids) * questions_per_quiz,
+        'students': students,
+        'attempts': attempts,
+        'pending': pending
+    }
@@ -0,0 +1,37 @@
+from sqlalchemy.dialects.sqlite import insert
+from models import db, ContentVersion
+
+# Counter names
+CONTENT = 'content'
+RESULTS = 'results'  # Bumped whenever the score aggregates change
+
+
+def quiz_version_name(quiz_id):
+    """Counter bumped whenever a quiz's questions or details change."""
+    return f'quiz:{quiz_id}'
+
+
+def bump_version(name=CONTENT):
+    """Increment a version counter on the caller's session.
+
+    The bump commits together with the change it describes, so a rolled back
+    write never invalidates anything and a committed one always does.
+    """
+    table = ContentVersion.__table__
+    stmt = insert(table).values(name=name, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.name],
+        set_={'version': table.c.version + 1}
+    )
+    db.session.execute(stmt)
+
+
+def get_version(name=CONTENT):
+    version = db.session.query(ContentVersion.version).filter_by(name=name).scalar()
+    return version or 0
+
+
+def get_versions(*names):
+    """Read several counters in one query, returned in the order given."""
+    rows = dict(db.session.query(ContentVersion.name, ContentVersion.version).filter(ContentVersion.name.in_(names)))
+    return tuple(rows.get(name, 0) for name in names)
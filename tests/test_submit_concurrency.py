@@ -0,0 +1,117 @@
+import importlib
+import os
+import shutil
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import db, Subject, Chapter, Quiz, Question, User, UserQuizzes, UserPerformance  # noqa: E402
+from services.quiz_meta import rebuild_question_counts  # noqa: E402
+from services.stats import check_stats_consistency  # noqa: E402
+
+SUBMISSIONS = 10
+
+
+@pytest.fixture(scope='module')
+def quizzer(tmp_path_factory):
+    """The app module, bound to a fresh SQLite database that is removed afterwards."""
+    db_dir = tmp_path_factory.mktemp('quizzer')
+    # The app binds its database at import time
+    os.environ['QUIZZER_DATABASE_URI'] = 'sqlite:///' + str(db_dir / 'quizzer.db')
+    app_module = importlib.import_module('app')
+    yield app_module
+    app_module.submission_queue.shutdown()
+    app_module.password_hasher.shutdown()
+    with app_module.app.app_context():
+        db.engine.dispose()
+    os.environ.pop('QUIZZER_DATABASE_URI', None)
+    shutil.rmtree(db_dir, ignore_errors=True)
+
+
+@pytest.fixture
+def assignment(quizzer):
+    """Seed one quiz assigned to one new student; returns (user id, quiz id, answer form)."""
+    with quizzer.app.app_context():
+        subject = Subject(name='Concurrency')
+        db.session.add(subject)
+        db.session.flush()
+        chapter = Chapter(title='Races', subject_id=subject.id, order=1)
+        db.session.add(chapter)
+        db.session.flush()
+        quiz = Quiz(title='Double submit', subject_id=subject.id, chapter_id=chapter.id, duration=10)
+        db.session.add(quiz)
+        db.session.flush()
+        questions = [Question(quiz_id=quiz.id, title=f'Question {i}', options=['a', 'b', 'c'], correct_answer=i % 3)
+                     for i in range(3)]
+        db.session.add_all(questions)
+        count = User.query.count()
+        student = User(full_name='Student', email=f'student{count}@example.com', username=f'student{count}',
+                       password='unused', role='student')
+        db.session.add(student)
+        db.session.flush()
+        db.session.add(UserQuizzes(user_id=student.id, quiz_id=quiz.id))
+        rebuild_question_counts()
+        db.session.commit()
+        form = {f'answer_{question.id}': '0' for question in questions}
+        return student.id, quiz.id, form
+
+
+@pytest.fixture
+def statuses(quizzer, monkeypatch):
+    """Record the status of every submission, in the order they were reported."""
+    recorded = []
+    original = quizzer.flash_submission_result
+
+    def record(status, score):
+        recorded.append(status)
+        original(status, score)
+
+    monkeypatch.setattr(quizzer, 'flash_submission_result', record)
+    return recorded
+
+
+def _submit(app, user_id, quiz_id, form, key):
+    client = app.test_client()
+    with client.session_transaction() as flask_session:
+        flask_session['user_id'] = user_id
+        flask_session['role'] = 'student'
+    return client.post(f'/submit_quiz/{quiz_id}', data=dict(form, submission_key=key))
+
+
+@pytest.mark.parametrize('group_commit', [False, True])
+def test_concurrent_submissions_complete_once(quizzer, monkeypatch, assignment, statuses, group_commit):
+    app = quizzer.app
+    monkeypatch.setitem(app.config, 'SUBMISSION_GROUP_COMMIT', group_commit)
+    user_id, quiz_id, form = assignment
+    start = threading.Barrier(SUBMISSIONS)
+    responses = []
+
+    def submit(key):
+        start.wait()
+        responses.append(_submit(app, user_id, quiz_id, form, key))
+
+    threads = [threading.Thread(target=submit, args=(f'key-{i}',)) for i in range(SUBMISSIONS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [response.status_code for response in responses] == [302] * SUBMISSIONS
+    assert statuses.count('submitted') == 1
+    assert statuses.count('already_completed') == SUBMISSIONS - 1
+
+    with app.app_context():
+        attempts = UserQuizzes.query.filter_by(user_id=user_id, quiz_id=quiz_id, completed=True).all()
+        assert len(attempts) == 1
+        assert db.session.get(UserPerformance, user_id).attempt_count == 1
+        assert check_stats_consistency() == []
+        winning_key = attempts[0].submission_key
+
+    # A retry of the accepted submission is reported as that submission, not as a second attempt
+    _submit(app, user_id, quiz_id, form, winning_key)
+    assert statuses[-1] == 'duplicate'
+    with app.app_context():
+        assert db.session.get(UserPerformance, user_id).attempt_count == 1